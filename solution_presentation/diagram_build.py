@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Parallel, incremental build for the solution presentation diagrams
+
+Every diagram is listed once in DIAGRAMS (module + create function). Renders
+run in a process pool on the non-interactive Agg backend, each figure is drawn
+once and saved in every requested format, and outputs whose content hash
+(diagram source, shared helpers, theme, dpi, save options) is unchanged are skipped.
+
+Theme variants are a JSON file mapping variant name -> COLORS overrides; each
+non-default variant is written to images/<variant>/ and all variants render
+in the same pool.
+
+Usage:
+    python3 solution_presentation/diagram_build.py
+    python3 solution_presentation/diagram_build.py --formats png,svg,pdf
+    python3 solution_presentation/diagram_build.py --themes deck_themes.json --jobs 8
+    python3 solution_presentation/diagram_build.py --only data_pipeline --force
+    python3 solution_presentation/diagram_build.py --list
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+PRESENTATION_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(PRESENTATION_DIR, 'images')
+MANIFEST_NAME = '.build_manifest.json'
+
+# Module holding setup_figure and the drawing helpers shared by every diagram
+SHARED_MODULE = 'generate_diagrams'
+DEFAULT_VARIANT = 'default'
+
+Diagram = namedtuple('Diagram', ['name', 'module', 'function', 'formats'])
+
+DIAGRAMS = [
+    Diagram('architecture_overview', 'generate_diagrams', 'create_architecture_diagram', ('png',)),
+    Diagram('data_pipeline', 'generate_diagrams', 'create_data_pipeline_diagram', ('png',)),
+    Diagram('ml_capabilities', 'generate_diagrams', 'create_ml_capabilities_diagram', ('png',)),
+    Diagram('intelligence_architecture', 'generate_diagrams', 'create_intelligence_diagram', ('png',)),
+    Diagram('architecture_diagram_bottom_up', 'generate_bottom_up_diagram',
+            'create_bottom_up_architecture', ('jpg',)),
+]
+
+SAVEFIG_FORMATS = {'png': 'png', 'svg': 'svg', 'pdf': 'pdf', 'jpg': 'jpeg'}
+
+# facecolor 'auto' keeps the figure's own (themed COLORS['white']) background
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'facecolor': 'auto', 'edgecolor': 'none'}
+
+
+# ---------------------------------------------------------------------------
+# Content hashing
+# ---------------------------------------------------------------------------
+
+def _is_diagram_entry(node):
+    """True for create_*/main definitions and the __main__ block"""
+    if isinstance(node, ast.FunctionDef):
+        return node.name.startswith('create_') or node.name == 'main'
+    if isinstance(node, ast.If):
+        test = node.test
+        return (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name)
+                and test.left.id == '__name__')
+    return False
+
+
+def _parse_module(module, cache):
+    """Split a module into its shared source and per-function sources"""
+    if module not in cache:
+        with open(os.path.join(PRESENTATION_DIR, module + '.py')) as f:
+            source = f.read()
+        tree = ast.parse(source)
+        shared, functions = [], {}
+        for node in tree.body:
+            segment = ast.get_source_segment(source, node) or ''
+            if isinstance(node, ast.FunctionDef) and _is_diagram_entry(node):
+                functions[node.name] = segment
+            elif not _is_diagram_entry(node):
+                shared.append(segment)
+        cache[module] = ('\n'.join(shared), functions)
+    return cache[module]
+
+
+def diagram_hash(diagram, theme, dpi, cache):
+    """Hash of everything that affects the saved output of one diagram
+
+    Editing one create_* function only invalidates that diagram; editing a
+    helper, import or COLORS invalidates every diagram that can reach it.
+    """
+    digest = hashlib.sha256()
+    for module in sorted({SHARED_MODULE, diagram.module}):
+        shared, _ = _parse_module(module, cache)
+        digest.update(shared.encode())
+    _, functions = _parse_module(diagram.module, cache)
+    if diagram.function not in functions:
+        raise ValueError(f"{diagram.module}.{diagram.function} not found")
+    digest.update(functions[diagram.function].encode())
+    digest.update(json.dumps(theme, sort_keys=True).encode())
+    digest.update(str(dpi).encode())
+    digest.update(json.dumps(SAVEFIG_OPTIONS, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_BASE_COLORS = {}
+
+
+def _init_worker():
+    """Pin the Agg backend before pyplot is imported in the worker"""
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg')
+    if PRESENTATION_DIR not in sys.path:
+        sys.path.insert(0, PRESENTATION_DIR)
+
+
+def _apply_theme(theme):
+    """Reset every loaded diagram module's COLORS, then overlay the variant
+
+    Diagram functions read the module-level COLORS dict at draw time, so it is
+    updated in place; workers are reused across tasks, hence the reset.
+    """
+    for module_name in sorted({d.module for d in DIAGRAMS} | {SHARED_MODULE}):
+        module = importlib.import_module(module_name)
+        colors = module.COLORS
+        base = _BASE_COLORS.setdefault(module_name, dict(colors))
+        colors.clear()
+        colors.update(base)
+        colors.update(theme)
+
+
+def _render(task):
+    """Draw one diagram once and save it in every requested format"""
+    import matplotlib.pyplot as plt
+
+    diagram = task['diagram']
+    _apply_theme(task['theme'])
+    module = importlib.import_module(diagram.module)
+
+    start = time.perf_counter()
+    fig = getattr(module, diagram.function)()
+    render_s = time.perf_counter() - start
+
+    save_s = {}
+    try:
+        for fmt, path in task['outputs'].items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            t0 = time.perf_counter()
+            fig.savefig(path, dpi=task['dpi'], format=SAVEFIG_FORMATS[fmt], **SAVEFIG_OPTIONS)
+            save_s[fmt] = time.perf_counter() - t0
+    finally:
+        plt.close(fig)
+
+    return {
+        'name': diagram.name,
+        'variant': task['variant'],
+        'hash': task['hash'],
+        'outputs': task['outputs'],
+        'render_s': render_s,
+        'save_s': save_s,
+        'pid': os.getpid(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Build orchestration
+# ---------------------------------------------------------------------------
+
+def load_themes(path):
+    """Read {variant: {color_key: hex}}; the default variant is always included"""
+    themes = {DEFAULT_VARIANT: {}}
+    if path:
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+            raise ValueError(f"{path}: expected an object of variant -> COLORS overrides")
+        themes.update(data)
+    return themes
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan(diagrams, themes, formats, dpi, out_dir, manifest, force=False):
+    """Split diagram x variant tasks into (to_render, skipped)"""
+    cache = {}
+    to_render, skipped = [], []
+    for variant, theme in themes.items():
+        variant_dir = out_dir if variant == DEFAULT_VARIANT else os.path.join(out_dir, variant)
+        for diagram in diagrams:
+            digest = diagram_hash(diagram, theme, dpi, cache)
+            outputs = {
+                fmt: os.path.join(variant_dir, f"{diagram.name}.{fmt}")
+                for fmt in (formats or diagram.formats)
+            }
+            task = {'diagram': diagram, 'variant': variant, 'theme': theme,
+                    'dpi': dpi, 'hash': digest, 'outputs': outputs}
+            fresh = all(
+                os.path.exists(path)
+                and manifest.get(os.path.relpath(path, out_dir)) == digest
+                for path in outputs.values()
+            )
+            (skipped if fresh and not force else to_render).append(task)
+    return to_render, skipped
+
+
+def build(diagrams, themes, formats=None, dpi=150, out_dir=IMAGES_DIR, jobs=None, force=False):
+    """Render stale diagrams in a process pool; returns (results, skipped, failures)"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    to_render, skipped = plan(diagrams, themes, formats, dpi, out_dir, manifest, force)
+
+    results, failures = [], []
+    if to_render:
+        jobs = jobs or min(len(to_render), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, task): task for task in to_render}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures.append((task, e))
+                    print(f"  FAILED {task['variant']}/{task['diagram'].name}: {e}")
+                    continue
+                results.append(result)
+                for path in result['outputs'].values():
+                    manifest[os.path.relpath(path, out_dir)] = result['hash']
+                print(f"  Rendered {result['variant']}/{result['name']} "
+                      f"({', '.join(result['outputs'])})")
+        save_manifest(out_dir, manifest)
+    return results, skipped, failures
+
+
+def print_report(results, skipped, wall_s):
+    """Per-diagram timing table"""
+    print(f"\n{'VARIANT':<14} {'DIAGRAM':<32} {'RENDER':>8} {'SAVE':>8} {'TOTAL':>8}  FORMATS")
+    for r in sorted(results, key=lambda r: (r['variant'], r['name'])):
+        save = sum(r['save_s'].values())
+        per_format = ' '.join(f"{fmt}={s:.2f}s" for fmt, s in r['save_s'].items())
+        print(f"{r['variant']:<14} {r['name']:<32} {r['render_s']:>7.2f}s {save:>7.2f}s "
+              f"{r['render_s'] + save:>7.2f}s  {per_format}")
+    for task in sorted(skipped, key=lambda t: (t['variant'], t['diagram'].name)):
+        print(f"{task['variant']:<14} {task['diagram'].name:<32} {'(up to date)':>26}")
+
+    cpu_s = sum(r['render_s'] + sum(r['save_s'].values()) for r in results)
+    print(f"\nRendered {len(results)}, skipped {len(skipped)} | "
+          f"wall {wall_s:.2f}s, worker time {cpu_s:.2f}s")
+
+
+def write_report(path, results, skipped, wall_s):
+    report = {
+        'wall_s': round(wall_s, 3),
+        'rendered': [
+            {'variant': r['variant'], 'diagram': r['name'], 'render_s': round(r['render_s'], 3),
+             'save_s': {k: round(v, 3) for k, v in r['save_s'].items()},
+             'outputs': list(r['outputs'].values())}
+            for r in results
+        ],
+        'skipped': [{'variant': t['variant'], 'diagram': t['diagram'].name} for t in skipped],
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build solution presentation diagrams')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Diagram names to build')
+    parser.add_argument('--formats', help='Comma-separated output formats (png,svg,pdf,jpg); '
+                                          'default is each diagram\'s own format')
+    parser.add_argument('--themes', help='JSON file of theme variants: {name: {color_key: hex}}')
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--out', default=IMAGES_DIR, help='Output directory')
+    parser.add_argument('--force', action='store_true', help='Re-render even if up to date')
+    parser.add_argument('--report', help='Also write the timing report as JSON')
+    parser.add_argument('--list', action='store_true', help='List registered diagrams')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for d in DIAGRAMS:
+            print(f"{d.name:<32} {d.module}.{d.function} [{','.join(d.formats)}]")
+        return 0
+
+    diagrams = DIAGRAMS
+    if args.only:
+        known = {d.name for d in DIAGRAMS}
+        unknown = sorted(set(args.only) - known)
+        if unknown:
+            parser.error(f"unknown diagram(s): {', '.join(unknown)}")
+        diagrams = [d for d in DIAGRAMS if d.name in args.only]
+
+    formats = None
+    if args.formats:
+        formats = tuple(f.strip().lower() for f in args.formats.split(',') if f.strip())
+        bad = sorted(set(formats) - set(SAVEFIG_FORMATS))
+        if bad:
+            parser.error(f"unsupported format(s): {', '.join(bad)}")
+
+    themes = load_themes(args.themes)
+
+    print(f"Building {len(diagrams)} diagram(s) x {len(themes)} theme variant(s)...")
+    start = time.perf_counter()
+    results, skipped, failures = build(diagrams, themes, formats, args.dpi,
+                                       args.out, args.jobs, args.force)
+    wall_s = time.perf_counter() - start
+
+    print_report(results, skipped, wall_s)
+    if args.report:
+        write_report(args.report, results, skipped, wall_s)
+    print(f"Output directory: {args.out}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,7 +9,8 @@ import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Rectangle, Circle
 from matplotlib.lines import Line2D
 import matplotlib.patheffects as pe
-import os
+
+from generate_diagrams import setup_figure
 
 COLORS = {
     'primary_blue': '#29B5E8',
@@ -23,14 +24,6 @@ COLORS = {
     'border_gray': '#D1D5DB',
 }
 
-def setup_figure(figsize=(14, 10)):
-    fig, ax = plt.subplots(figsize=figsize, facecolor=COLORS['white'])
-    ax.set_facecolor(COLORS['white'])
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    return fig, ax
-
 def draw_header_bar(ax, y, label, color=None):
     if color is None:
         color = COLORS['primary_blue']
@@ -271,13 +264,5 @@ def create_bottom_up_architecture():
     return fig
 
 if __name__ == '__main__':
-    output_dir = '/Users/srsubramanian/Solutions/Airlines-IROPS/solution_presentation/images'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    print("Generating bottom-up architecture diagram...")
-    fig = create_bottom_up_architecture()
-    
-    filepath = os.path.join(output_dir, 'architecture_diagram_bottom_up.jpg')
-    fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none', format='jpeg')
-    plt.close(fig)
-    print(f"Saved to {filepath}")
+    from diagram_build import main
+    raise SystemExit(main(['--only', 'architecture_diagram_bottom_up']))
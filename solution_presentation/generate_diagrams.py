@@ -8,7 +8,6 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, Circle, Rectangle
 import numpy as np
-import os
 
 # Snowflake Brand Colors
 COLORS = {
@@ -448,31 +447,12 @@ def create_intelligence_diagram():
     return fig
 
 def main():
-    """Generate all diagrams"""
-    output_dir = 'solution_presentation/images'
-    os.makedirs(output_dir, exist_ok=True)
-    
+    """Generate all diagrams (parallel, incremental build via diagram_build)"""
+    from diagram_build import main as build_main
+
     print("Generating Snowflake-branded IROPS diagrams...")
-    
-    # Generate each diagram
-    diagrams = [
-        ('architecture_overview.png', create_architecture_diagram),
-        ('data_pipeline.png', create_data_pipeline_diagram),
-        ('ml_capabilities.png', create_ml_capabilities_diagram),
-        ('intelligence_architecture.png', create_intelligence_diagram),
-    ]
-    
-    for filename, create_func in diagrams:
-        print(f"  Creating {filename}...")
-        fig = create_func()
-        filepath = os.path.join(output_dir, filename)
-        fig.savefig(filepath, dpi=150, bbox_inches='tight', 
-                    facecolor='white', edgecolor='none')
-        plt.close(fig)
-        print(f"    Saved to {filepath}")
-    
-    print("\nAll diagrams generated successfully!")
-    print(f"Output directory: {output_dir}")
+    return build_main(['--only', 'architecture_overview', 'data_pipeline',
+                       'ml_capabilities', 'intelligence_architecture'])
 
 if __name__ == '__main__':
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Concurrent latency / cost evaluation runner for IROPS_ASSISTANT
+
+Replays the eval dataset named in IROPS_ASSISTANT_eval_config_v2.yaml against
+an agent spec version from versions/ (or a local mock agent) with bounded
+concurrency, and records per question:
+    ttft_s          time to first response text token
+    latency_s       total time to the end of the stream
+    tool_calls      tool results returned to the orchestrator
+    sql_runtime_s   warehouse runtime of the generated SQL (--time-sql)
+    tokens          tokens reported by the agent (estimated when absent)
+
+Results are saved next to the spec as versions/<version>/perf_eval.json so
+two versions can be diffed before a prompt change ships.
+
+Usage:
+    python3 tools/agent_eval_runner.py run v20260318-0107
+    python3 tools/agent_eval_runner.py run v20260318-0107 --mock --concurrency 16
+    python3 tools/agent_eval_runner.py run v20260318-0107 --dataset questions.jsonl --time-sql
+    python3 tools/agent_eval_runner.py diff v20260318-0107 v20260401-0930 --threshold 10
+
+`diff` exits non-zero when any p50/p90 metric regresses by more than the
+threshold percentage, so it can gate a spec change in CI.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENT_DIR = os.path.join(REPO_ROOT, 'PHANTOM_IROPS_ANALYTICS_IROPS_ASSISTANT')
+EVAL_CONFIG = os.path.join(AGENT_DIR, 'IROPS_ASSISTANT_eval_config_v2.yaml')
+VERSIONS_DIR = os.path.join(AGENT_DIR, 'versions')
+RESULTS_FILE = 'perf_eval.json'
+WAREHOUSE = 'PHANTOM_IROPS_WH'
+
+METRICS = ['ttft_s', 'latency_s', 'tool_calls', 'sql_runtime_s', 'tokens']
+# Higher is worse for every metric, so a positive delta is a regression
+DIFF_PERCENTILES = ['p50', 'p90']
+
+
+def _connect():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        connection_name=os.getenv("SNOWFLAKE_CONNECTION_NAME") or "USWEST_DEMOACCOUNT")
+
+
+def load_spec(version):
+    """Agent spec for a version: the post-edit full_spec, else the captured config"""
+    directory = os.path.join(VERSIONS_DIR, version)
+    for filename in ('full_spec.json', 'agent_config.json'):
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+    raise SystemExit(f"No spec found for {version} in {VERSIONS_DIR}")
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+def load_dataset(path=None, config_path=EVAL_CONFIG, spec=None, use_samples=False):
+    """Questions as [{'query': ..., 'ground_truth': ...}]
+
+    Reads a local CSV / JSON lines export when given, otherwise the table and
+    column mapping from the eval config. `use_samples` falls back to the
+    spec's sample_questions so the mock agent runs with no warehouse access.
+    """
+    with open(config_path) as f:
+        dataset = yaml.safe_load(f)['dataset']
+    mapping = dataset['column_mapping']
+    query_col, truth_col = mapping['query_text'], mapping['ground_truth']
+
+    if path:
+        with open(path) as f:
+            if path.lower().endswith('.csv'):
+                rows = list(csv.DictReader(f))
+            else:
+                rows = [json.loads(line) for line in f if line.strip()]
+    elif use_samples:
+        rows = [{query_col: q['question'], truth_col: q.get('answer')}
+                for q in (spec or {}).get('instructions', {}).get('sample_questions', [])]
+    else:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(f"SELECT {query_col}, {truth_col} FROM {dataset['table_name']}")
+            rows = [dict(zip([query_col, truth_col], row)) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
+
+    questions = []
+    for row in rows:
+        row = {k.upper(): v for k, v in row.items()}
+        if row.get(query_col.upper()):
+            questions.append({'query': row[query_col.upper()], 'ground_truth': row.get(truth_col.upper())})
+    return questions
+
+
+# ---------------------------------------------------------------------------
+# Agents
+# ---------------------------------------------------------------------------
+
+class CortexAgent:
+    """Runs the spec inline against the Cortex Agents REST API and yields SSE events"""
+
+    def __init__(self, spec, warehouse=WAREHOUSE, timeout=300):
+        host = os.getenv('SNOWFLAKE_HOST')
+        if host:
+            self.url = f"https://{host}/api/v2/cortex/agent:run"
+        else:
+            account = os.environ['SNOWFLAKE_ACCOUNT'].lower().replace('_', '-')
+            self.url = f"https://{account}.snowflakecomputing.com/api/v2/cortex/agent:run"
+        token = os.getenv('SNOWFLAKE_PASSWORD')
+        if not token and os.path.exists('/snowflake/session/token'):
+            with open('/snowflake/session/token') as f:
+                token = f.read()
+        if not token:
+            raise SystemExit("SNOWFLAKE_PASSWORD not set and SPCS token file not found")
+        self.token = token
+        self.spec = spec
+        self.warehouse = warehouse
+        self.timeout = timeout
+
+    def _stream(self, question, emit):
+        body = dict(self.spec)
+        body['messages'] = [{'role': 'user', 'content': [{'type': 'text', 'text': question}]}]
+        body.setdefault('warehouse', self.warehouse)
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode(), method='POST', headers={
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'Authorization': f"Bearer {self.token}",
+        })
+        event = ''
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            for raw in response:
+                line = raw.decode('utf-8').rstrip('\n')
+                if line.startswith('event: '):
+                    event = line[7:].strip()
+                elif line.startswith('data: '):
+                    try:
+                        emit(event, json.loads(line[6:]))
+                    except json.JSONDecodeError:
+                        pass
+
+    async def run(self, question, emit):
+        # urllib streams block, so each question gets a worker thread;
+        # emit is called from that thread with wall-clock ordering preserved
+        await asyncio.to_thread(self._stream, question, emit)
+
+
+class MockAgent:
+    """Local stand-in that emits the same event shapes with spec-dependent timing
+
+    Random draws are seeded by the question alone, so two spec versions see
+    identical tool latencies, SQL runtimes and base token counts; only the
+    modelled effects (instruction length, tool routing) move between versions
+    and diff reports nothing for an edit that changes neither.
+    """
+
+    def __init__(self, spec, time_scale=1.0):
+        self.spec = spec
+        self.time_scale = time_scale
+        instructions = spec.get('instructions', {})
+        self.prompt_chars = len(instructions.get('orchestration', '')) + len(instructions.get('response', ''))
+
+    async def run(self, question, emit):
+        rng = random.Random(question)
+        lowered = question.lower()
+        tools = []
+        if any(w in lowered for w in ('how many', 'count', 'average', 'top', 'total', 'show', 'which', 'what')):
+            tools.append('irops_analytics')
+        if 'incident' in lowered or 'similar' in lowered:
+            tools.append('incident_search')
+        if 'maintenance' in lowered or 'procedure' in lowered:
+            tools.append('maintenance_search')
+        tools = tools or ['irops_analytics']
+
+        sleep = lambda seconds: asyncio.sleep(seconds * self.time_scale)
+        await sleep(0.3 + self.prompt_chars / 20000 + rng.uniform(0, 0.3))
+        emit('response.thinking.delta', {'text': 'Planning tool calls'})
+        for tool in tools:
+            emit('response.tool_start', {'name': tool})
+            await sleep(rng.uniform(0.4, 1.5))
+            content = {'searchResults': []}
+            if tool == 'irops_analytics':
+                content = {'sql': f"SELECT COUNT(*) FROM ANALYTICS.MART_GOLDEN_RECORD -- {question[:40]}",
+                           'result_set': {'data': [{'COUNT': rng.randint(0, 500)}]},
+                           'sql_runtime_ms': rng.uniform(150, 2500)}
+            emit('response.tool_result', {'name': tool, 'content': [{'type': 'json', 'json': content}]})
+        output_tokens = rng.randint(120, 400) + self.prompt_chars // 200
+        await sleep(rng.uniform(0.2, 0.6))
+        for _ in range(8):
+            emit('response.text.delta', {'text': 'lorem ipsum ' * (output_tokens // 16)})
+            await sleep(output_tokens * 0.01 / 8)
+        emit('response', {'usage': {'input_tokens': 2000 + self.prompt_chars // 4, 'output_tokens': output_tokens}})
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _find_usage(data):
+    """Total tokens from any usage block in an event payload"""
+    if isinstance(data, dict):
+        usage = data.get('usage') or data.get('token_usage')
+        if isinstance(usage, dict):
+            numbers = [v for k, v in usage.items() if 'token' in k and isinstance(v, (int, float))]
+            if numbers:
+                return sum(numbers)
+        for value in data.values():
+            found = _find_usage(value)
+            if found:
+                return found
+    elif isinstance(data, list):
+        for value in data:
+            found = _find_usage(value)
+            if found:
+                return found
+    return None
+
+
+async def evaluate_question(agent, item, conn=None):
+    started = time.perf_counter()
+    record = {'query': item['query'], 'ttft_s': None, 'tool_calls': 0, 'sql': [], 'tokens': None,
+              'tokens_estimated': False, 'sql_runtime_s': None, 'error': None}
+    text = []
+    reported_sql_ms = []
+
+    def emit(event, data):
+        if event == 'response.text.delta':
+            if record['ttft_s'] is None:
+                record['ttft_s'] = time.perf_counter() - started
+            text.append(data.get('delta', {}).get('text') or data.get('text') or '')
+        elif event == 'response.tool_result':
+            record['tool_calls'] += 1
+            for content in data.get('content', []):
+                payload = content.get('json') or {}
+                if payload.get('sql'):
+                    record['sql'].append(payload['sql'])
+                if payload.get('sql_runtime_ms') is not None:
+                    reported_sql_ms.append(payload['sql_runtime_ms'])
+        usage = _find_usage(data)
+        if usage:
+            record['tokens'] = usage
+
+    try:
+        await agent.run(item['query'], emit)
+    except Exception as exc:
+        record['error'] = str(exc)
+    record['latency_s'] = time.perf_counter() - started
+
+    if record['tokens'] is None and text:
+        # ~4 characters per token for English output when the stream reports no usage
+        record['tokens'] = len(''.join(text)) // 4
+        record['tokens_estimated'] = True
+    if conn is not None and record['sql']:
+        record['sql_runtime_s'] = await asyncio.to_thread(time_sql, conn, record['sql'])
+    elif reported_sql_ms:
+        record['sql_runtime_s'] = sum(reported_sql_ms) / 1000
+    return record
+
+
+def time_sql(conn, statements):
+    """Re-run generated SQL uncached and return total wall time"""
+    cur = conn.cursor()
+    total = 0.0
+    try:
+        cur.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+        for sql in statements:
+            started = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            total += time.perf_counter() - started
+    finally:
+        cur.close()
+    return total
+
+
+async def run_eval(agent, questions, concurrency, conn=None, progress=True):
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def bounded(item):
+        nonlocal done
+        async with semaphore:
+            record = await evaluate_question(agent, item, conn)
+        done += 1
+        if progress:
+            status = 'ERR' if record['error'] else f"{record['latency_s']:.1f}s"
+            print(f"  [{done}/{len(questions)}] {status:>6}  {item['query'][:70]}")
+        return record
+
+    return await asyncio.gather(*(bounded(q) for q in questions))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarise(records):
+    summary = {}
+    for metric in METRICS:
+        values = [r[metric] for r in records if r.get(metric) is not None and not r['error']]
+        summary[metric] = {
+            'count': len(values),
+            'mean': statistics.fmean(values) if values else None,
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': max(values) if values else None,
+        }
+    summary['errors'] = sum(1 for r in records if r['error'])
+    summary['questions'] = len(records)
+    return summary
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def print_summary(summary):
+    print(f"\n{'METRIC':<15} {'N':>4} {'MEAN':>9} {'P50':>9} {'P90':>9} {'P99':>9} {'MAX':>9}")
+    for metric in METRICS:
+        s = summary[metric]
+        print(f"{metric:<15} {s['count']:>4} " + ' '.join(
+            f"{_fmt(s[k]):>9}" for k in ('mean', 'p50', 'p90', 'p99', 'max')))
+    print(f"errors: {summary['errors']}")
+
+
+def diff(version_a, version_b, threshold):
+    """Compare saved summaries; returns the list of regressions"""
+    results = []
+    for version in (version_a, version_b):
+        path = os.path.join(VERSIONS_DIR, version, RESULTS_FILE)
+        if not os.path.exists(path):
+            raise SystemExit(f"No {RESULTS_FILE} for {version}; run it first")
+        with open(path) as f:
+            results.append(json.load(f)['summary'])
+    before, after = results
+
+    regressions = []
+    print(f"{'METRIC':<15} {'PCTL':<5} {version_a:>16} {version_b:>16} {'DELTA':>8}")
+    for metric in METRICS:
+        for pctl in DIFF_PERCENTILES + ['p99']:
+            a, b = before[metric][pctl], after[metric][pctl]
+            if a is None or b is None:
+                continue
+            # A zero baseline that becomes positive is an unbounded increase
+            change = (b - a) / a * 100 if a else (math.inf if b > 0 else 0.0)
+            flag = ''
+            if pctl in DIFF_PERCENTILES and change > threshold:
+                flag = '  REGRESSION'
+                regressions.append((metric, pctl, change))
+            print(f"{metric:<15} {pctl:<5} {_fmt(a):>16} {_fmt(b):>16} {change:>+7.1f}%{flag}")
+
+    # Errored questions are left out of the latency samples, so a version that
+    # fails more often would otherwise look faster; any rise in errors fails
+    rate_a = before['errors'] / before['questions'] if before.get('questions') else before['errors']
+    rate_b = after['errors'] / after['questions'] if after.get('questions') else after['errors']
+    flag = ''
+    if rate_b > rate_a:
+        flag = '  REGRESSION'
+        regressions.append(('errors', 'count', after['errors'] - before['errors']))
+    print(f"{'errors':<15} {'':<5} {before['errors']:>16} {after['errors']:>16} {'':>8}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Replay the dataset against a spec version')
+    run.add_argument('version', help='Directory under versions/, e.g. v20260318-0107')
+    run.add_argument('--dataset', help='Local CSV / JSON lines with the eval config column names')
+    run.add_argument('--concurrency', type=int, default=4, help='Questions in flight at once')
+    run.add_argument('--mock', action='store_true', help='Use the local mock agent instead of Cortex')
+    run.add_argument('--mock-time-scale', type=float, default=1.0, help='Speed up mock sleeps, e.g. 0.1')
+    run.add_argument('--time-sql', action='store_true', help='Re-run generated SQL uncached to time it')
+    run.add_argument('--limit', type=int, help='Only the first N questions')
+
+    compare = sub.add_parser('diff', help='Compare saved results of two versions')
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type=float, default=10.0, help='Allowed p50/p90 increase in percent')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        regressions = diff(args.before, args.after, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): p50/p90 up more than "
+                  f"{args.threshold:.0f}% or a higher error rate")
+            sys.exit(1)
+        return
+
+    spec = load_spec(args.version)
+    questions = load_dataset(args.dataset, spec=spec, use_samples=args.mock and not args.dataset)
+    if args.limit:
+        questions = questions[:args.limit]
+    if not questions:
+        raise SystemExit("Dataset is empty")
+    agent = MockAgent(spec, args.mock_time_scale) if args.mock else CortexAgent(spec)
+    conn = _connect() if args.time_sql else None
+
+    print(f"Evaluating {args.version} ({'mock' if args.mock else 'Cortex'}) on "
+          f"{len(questions)} questions, concurrency {args.concurrency}")
+    started = time.perf_counter()
+    try:
+        records = asyncio.run(run_eval(agent, questions, args.concurrency, conn))
+    finally:
+        if conn is not None:
+            conn.close()
+    wall = time.perf_counter() - started
+
+    summary = summarise(records)
+    print_summary(summary)
+    print(f"wall time: {wall:.1f}s")
+
+    path = os.path.join(VERSIONS_DIR, args.version, RESULTS_FILE)
+    with open(path, 'w') as f:
+        json.dump({
+            'version': args.version,
+            'agent': 'mock' if args.mock else 'cortex',
+            'run_at': datetime.utcnow().isoformat(),
+            'concurrency': args.concurrency,
+            'wall_time_s': wall,
+            'summary': summary,
+            'questions': records,
+        }, f, indent=2)
+    print(f"Saved {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped columnar day snapshots of IROPS operational state
+
+Persists today's Golden Record, STG_CREW and STG_AIRCRAFT as columnar files
+that a restarting service maps straight into memory instead of re-pulling
+from the warehouse. Strings (airports, tails, statuses, ids) are dictionary
+encoded, numeric columns are fixed-width arrays read through memoryview with
+no copies, and flight status changes that arrive after the snapshot are kept
+in a per-table write-ahead delta log replayed on open.
+
+Usage:
+    python3 tools/day_snapshot.py build --dir snapshots/           # From Snowflake
+    python3 tools/day_snapshot.py build --dir snapshots/ --demo    # Synthetic day
+    python3 tools/day_snapshot.py catch-up --dir snapshots/        # Append streamed deltas
+    python3 tools/day_snapshot.py compact --dir snapshots/         # Fold deltas into a new version
+    python3 tools/day_snapshot.py info --dir snapshots/
+
+Files (one pair per table):
+    <table>.snap   magic + format version + JSON header (snapshot version,
+                   row count, Kafka offsets, column directory), then
+                   8-byte aligned column blocks
+    <table>.wal    magic + base snapshot version, then length/CRC framed
+                   JSON records, each tagged with its Kafka partition/offset
+
+Kafka offsets are captured before the tables are read, so the snapshot may
+already include some replayed events; deltas are idempotent field updates,
+so applying them twice is harmless.
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+
+SNAPSHOT_MAGIC = b'IROPSNAP'
+WAL_MAGIC = b'IROPSWAL'
+FORMAT_VERSION = 1
+ALIGN = 8
+
+NULL_CODE = 0xFFFFFFFF
+NULL_INT = -(1 << 63)
+NULL_BOOL = 2
+EPOCH = datetime(1970, 1, 1)
+
+# Column type -> memoryview format
+TYPE_FORMATS = {'str': 'I', 'int': 'q', 'float': 'd', 'bool': 'B', 'ts': 'q'}
+
+TABLES = {
+    'golden_record': {
+        'source': 'ANALYTICS.MART_GOLDEN_RECORD',
+        'where': 'flight_date = CURRENT_DATE()',
+        'key': 'flight_id',
+        'columns': [
+            ('flight_id', 'str'), ('flight_number', 'str'), ('flight_date', 'str'),
+            ('origin', 'str'), ('destination', 'str'),
+            ('scheduled_departure_utc', 'ts'), ('scheduled_arrival_utc', 'ts'),
+            ('actual_departure_utc', 'ts'), ('flight_status', 'str'),
+            ('departure_delay_minutes', 'int'), ('aircraft_id', 'str'), ('tail_number', 'str'),
+            ('aircraft_type_code', 'str'), ('aircraft_status', 'str'), ('is_ghost_flight', 'bool'),
+            ('captain_id', 'str'), ('first_officer_id', 'str'),
+            ('has_active_disruption', 'bool'), ('disruption_type', 'str'),
+            ('disruption_severity', 'str'), ('passengers_booked', 'int'), ('load_factor', 'float'),
+            ('total_estimated_cost', 'float'), ('needs_captain', 'bool'),
+            ('needs_first_officer', 'bool'), ('flight_health_score', 'float'),
+            ('recovery_priority_score', 'float'),
+        ],
+    },
+    'crew': {
+        'source': 'STAGING.STG_CREW',
+        'where': None,
+        'key': 'crew_id',
+        'columns': [
+            ('crew_id', 'str'), ('employee_id', 'str'), ('full_name', 'str'), ('crew_type', 'str'),
+            ('seniority_number', 'int'), ('base_airport', 'str'), ('status', 'str'),
+            ('qualified_aircraft_types', 'str'), ('monthly_hours_remaining', 'float'),
+            ('annual_hours_remaining', 'float'), ('availability_status', 'str'),
+        ],
+    },
+    'aircraft': {
+        'source': 'STAGING.STG_AIRCRAFT',
+        'where': None,
+        'key': 'aircraft_id',
+        'columns': [
+            ('aircraft_id', 'str'), ('tail_number', 'str'), ('aircraft_type_code', 'str'),
+            ('seat_capacity', 'int'), ('current_location', 'str'), ('status', 'str'),
+            ('mel_items_count', 'int'), ('days_until_maintenance', 'int'),
+            ('maintenance_health_score', 'float'), ('is_operationally_available', 'bool'),
+        ],
+    },
+}
+
+
+def _connect():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        connection_name=os.getenv("SNOWFLAKE_CONNECTION_NAME") or "USWEST_DEMOACCOUNT")
+
+
+def _pad(n):
+    return (ALIGN - n % ALIGN) % ALIGN
+
+
+# ---------------------------------------------------------------------------
+# Value encoding
+# ---------------------------------------------------------------------------
+
+def _to_micros(value):
+    if value is None:
+        return NULL_INT
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    return None if value == NULL_INT else EPOCH + timedelta(microseconds=value)
+
+
+def _normalise(kind, value):
+    """Coerce a warehouse / WAL value to the in-memory representation"""
+    if value is None:
+        return None
+    if kind == 'str':
+        return value.isoformat() if isinstance(value, date) else str(value)
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'bool':
+        return bool(value)
+    return _from_micros(_to_micros(value))
+
+
+def _wal_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# ---------------------------------------------------------------------------
+# Snapshot writer / reader
+# ---------------------------------------------------------------------------
+
+def _dictionary_block(values):
+    encoded = [v.encode() for v in values]
+    offsets, position = [], 0
+    for item in encoded:
+        offsets.append(position)
+        position += len(item)
+    offsets.append(position)
+    return struct.pack(f'<I{len(offsets)}I', len(values), *offsets) + b''.join(encoded)
+
+
+def write_snapshot(path, table, rows, version, offsets):
+    """Write rows (dicts) as a columnar snapshot, atomically replacing path"""
+    spec = TABLES[table]
+    key = spec['key']
+    # One row per key, later rows winning, so dictionary code == row index
+    unique = {}
+    for r in rows:
+        if r.get(key) is not None:
+            unique[str(r[key])] = r
+    rows = [unique[k] for k in sorted(unique)]
+    blocks, directory = [], []
+    for name, kind in spec['columns']:
+        values = [_normalise(kind, r.get(name)) for r in rows]
+        entry = {'name': name, 'type': kind}
+        if kind == 'str':
+            # Sorted dictionaries make the key column binary-searchable
+            dictionary = sorted({v for v in values if v is not None})
+            codes = {v: i for i, v in enumerate(dictionary)}
+            data = struct.pack(f'<{len(values)}I', *(NULL_CODE if v is None else codes[v] for v in values))
+            blocks.append(('dictionary', entry, _dictionary_block(dictionary)))
+        elif kind == 'float':
+            data = struct.pack(f'<{len(values)}d', *(float('nan') if v is None else v for v in values))
+        elif kind == 'bool':
+            data = bytes(NULL_BOOL if v is None else int(v) for v in values)
+        elif kind == 'ts':
+            data = struct.pack(f'<{len(values)}q', *(_to_micros(v) for v in values))
+        else:
+            data = struct.pack(f'<{len(values)}q', *(NULL_INT if v is None else v for v in values))
+        blocks.append(('data', entry, data))
+        directory.append(entry)
+
+    # Header length depends on block offsets, so lay blocks out relative to 0 first
+    position = 0
+    for field, entry, payload in blocks:
+        entry[field] = [position, len(payload)]
+        position += len(payload) + _pad(len(payload))
+    header = {
+        'table': table, 'source': spec['source'], 'key': key, 'version': version,
+        'rows': len(rows), 'created_at': datetime.utcnow().isoformat(),
+        'offsets': {str(p): o for p, o in offsets.items()}, 'columns': directory,
+    }
+    header_bytes = json.dumps(header).encode()
+    prefix = SNAPSHOT_MAGIC + struct.pack('<II', FORMAT_VERSION, len(header_bytes)) + header_bytes
+    prefix += b'\0' * _pad(len(prefix))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(prefix)
+        for _, _, payload in blocks:
+            f.write(payload + b'\0' * _pad(len(payload)))
+        f.flush()
+        os.fsync(f.fileno())
+    # The data offset is implied: blocks start right after the padded prefix
+    os.replace(tmp, path)
+
+
+class Dictionary:
+    """Zero-copy view of a dictionary block; decodes strings on access"""
+
+    def __init__(self, buf):
+        count = struct.unpack_from('<I', buf)[0]
+        self.offsets = buf[4:8 + 4 * count].cast('I')
+        self.data = buf[8 + 4 * count:]
+        self.count = count
+        self.cache = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, code):
+        value = self.cache.get(code)
+        if value is None:
+            value = self.cache[code] = bytes(self.data[self.offsets[code]:self.offsets[code + 1]]).decode()
+        return value
+
+    def code(self, value):
+        """Code for value, or None if the string is not in the dictionary"""
+        i = bisect.bisect_left(self, value)
+        return i if i < self.count and self[i] == value else None
+
+
+class Column:
+    """Typed, memory-mapped column"""
+
+    def __init__(self, kind, data, dictionary=None):
+        self.kind = kind
+        self.data = data
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        raw = self.data[i]
+        if self.kind == 'str':
+            return None if raw == NULL_CODE else self.dictionary[raw]
+        if self.kind == 'float':
+            return None if raw != raw else raw
+        if self.kind == 'bool':
+            return None if raw == NULL_BOOL else bool(raw)
+        if self.kind == 'ts':
+            return _from_micros(raw)
+        return None if raw == NULL_INT else raw
+
+    def indices(self, value):
+        """Row indices equal to value (None matches nulls), compared on encoded values"""
+        data = self.data
+        if self.kind == 'float':
+            if value is None:
+                return [i for i in range(len(data)) if data[i] != data[i]]
+            target = float(value)
+        elif value is None:
+            target = {'str': NULL_CODE, 'bool': NULL_BOOL}.get(self.kind, NULL_INT)
+        elif self.kind == 'str':
+            target = self.dictionary.code(str(value))
+            if target is None:
+                return []
+        elif self.kind == 'bool':
+            target = int(bool(value))
+        elif self.kind == 'ts':
+            target = _to_micros(value)
+        else:
+            target = int(value)
+        return [i for i in range(len(data)) if data[i] == target]
+
+
+class ColumnarTable:
+    """Read-only mmap of a .snap file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self.mmap)
+        if bytes(buf[:8]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an IROPS snapshot")
+        format_version, header_len = struct.unpack_from('<II', buf, 8)
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {format_version}, expected {FORMAT_VERSION}")
+        self.header = json.loads(bytes(buf[16:16 + header_len]))
+        base = 16 + header_len
+        base += _pad(base)
+        self.columns = {}
+        for entry in self.header['columns']:
+            start, length = entry['data']
+            data = buf[base + start:base + start + length].cast(TYPE_FORMATS[entry['type']])
+            dictionary = None
+            if 'dictionary' in entry:
+                start, length = entry['dictionary']
+                dictionary = Dictionary(buf[base + start:base + start + length])
+            self.columns[entry['name']] = Column(entry['type'], data, dictionary)
+        self.key = self.header['key']
+
+    def __len__(self):
+        return self.header['rows']
+
+    @property
+    def version(self):
+        return self.header['version']
+
+    @property
+    def offsets(self):
+        return {int(p): o for p, o in self.header['offsets'].items()}
+
+    def row(self, i):
+        return {name: column[i] for name, column in self.columns.items()}
+
+    def find(self, key):
+        """Row index for a primary key
+
+        Keys are unique and rows are stored in key order (write_snapshot
+        enforces both), so the key's dictionary code is its row index.
+        """
+        return self.columns[self.key].dictionary.code(key)
+
+    def close(self):
+        # Drop memoryviews before unmapping
+        self.columns = {}
+        self.mmap.close()
+
+
+# ---------------------------------------------------------------------------
+# Write-ahead delta log
+# ---------------------------------------------------------------------------
+
+class DeltaLog:
+    """Append-only length/CRC framed JSON records bound to one snapshot version"""
+
+    def __init__(self, path, base_version):
+        self.path = path
+        self.base_version = base_version
+        self.records = []
+        if os.path.exists(path):
+            self._replay()
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(WAL_MAGIC + struct.pack('<Q', base_version))
+        self.file = open(path, 'ab')
+
+    def _replay(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if data[:8] != WAL_MAGIC or len(data) < 16 or \
+                struct.unpack_from('<Q', data, 8)[0] != self.base_version:
+            # Deltas against another snapshot version are already folded in or stale
+            os.remove(self.path)
+            return
+        position = 16
+        while position + 8 <= len(data):
+            length, crc = struct.unpack_from('<II', data, position)
+            payload = data[position + 8:position + 8 + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            self.records.append(json.loads(payload))
+            position += 8 + length
+        if position < len(data):
+            # Torn write from a crash mid-append
+            with open(self.path, 'r+b') as f:
+                f.truncate(position)
+
+    def append(self, records):
+        for record in records:
+            payload = json.dumps(record, default=_wal_value).encode()
+            self.file.write(struct.pack('<II', len(payload), zlib.crc32(payload)) + payload)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records.extend(records)
+
+    def close(self):
+        self.file.close()
+
+
+class SnapshotTable:
+    """A mapped snapshot plus its replayed delta overlay"""
+
+    def __init__(self, directory, table):
+        self.table = table
+        self.spec = TABLES[table]
+        self.types = dict(self.spec['columns'])
+        self.base = ColumnarTable(os.path.join(directory, f"{table}.snap"))
+        self.wal = DeltaLog(os.path.join(directory, f"{table}.wal"), self.base.version)
+        self.overlay = {}
+        self.offsets = self.base.offsets
+        for record in self.wal.records:
+            self._apply(record)
+
+    def _apply(self, record):
+        key = record['key']
+        if record['op'] == 'delete':
+            self.overlay[key] = None
+        else:
+            current = self.overlay.get(key)
+            if current is None:
+                index = self.base.find(key)
+                current = self.base.row(index) if index is not None else {self.base.key: key}
+            current.update({k: _normalise(self.types[k], v)
+                            for k, v in record['values'].items() if k in self.types})
+            self.overlay[key] = current
+        if record.get('offset'):
+            partition, offset = record['offset']
+            self.offsets[partition] = max(offset, self.offsets.get(partition, -1))
+
+    def apply(self, records):
+        """Durably log then apply delta records"""
+        self.wal.append(records)
+        for record in records:
+            self._apply(record)
+
+    def get(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        index = self.base.find(key)
+        return self.base.row(index) if index is not None else None
+
+    def where(self, column, value):
+        """Rows whose column equals value"""
+        value = _normalise(self.types[column], value)
+        matches = {}
+        for i in self.base.columns[column].indices(value):
+            key = self.base.columns[self.base.key][i]
+            if key not in self.overlay:
+                matches[key] = self.base.row(i)
+        for key, row in self.overlay.items():
+            if row is not None and row.get(column) == value:
+                matches[key] = row
+        return list(matches.values())
+
+    def rows(self):
+        key_column = self.base.columns[self.base.key]
+        for i in range(len(self.base)):
+            if key_column[i] not in self.overlay:
+                yield self.base.row(i)
+        for row in self.overlay.values():
+            if row is not None:
+                yield row
+
+    def close(self):
+        self.wal.close()
+        self.base.close()
+
+
+class DaySnapshot:
+    """All operational tables for one day, opened together"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {name: SnapshotTable(directory, name) for name in TABLES}
+
+    def __getitem__(self, table):
+        return self.tables[table]
+
+    @property
+    def offsets(self):
+        return self.tables['golden_record'].offsets
+
+    def compact(self):
+        """Fold deltas into a new snapshot version and start empty logs"""
+        for name, table in list(self.tables.items()):
+            rows = list(table.rows())
+            version = table.base.version + 1
+            offsets = dict(table.offsets)
+            table.close()
+            write_snapshot(os.path.join(self.directory, f"{name}.snap"), name, rows, version, offsets)
+            self.tables[name] = SnapshotTable(self.directory, name)
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+
+
+# ---------------------------------------------------------------------------
+# Warehouse integration
+# ---------------------------------------------------------------------------
+
+def fetch_offsets(cur, database):
+    cur.execute(f"SELECT kafka_partition, MAX(kafka_offset) FROM {database}.RAW.FLIGHT_STATUS_EVENTS "
+                f"WHERE kafka_partition IS NOT NULL GROUP BY kafka_partition")
+    return {int(p): int(o) for p, o in cur.fetchall()}
+
+
+def build_from_snowflake(directory, database, version):
+    conn = _connect()
+    cur = conn.cursor()
+    try:
+        offsets = fetch_offsets(cur, database)
+        for name, spec in TABLES.items():
+            columns = [c for c, _ in spec['columns']]
+            sql = f"SELECT {', '.join(columns)} FROM {database}.{spec['source']}"
+            if spec['where']:
+                sql += f" WHERE {spec['where']}"
+            cur.execute(sql)
+            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+            write_snapshot(os.path.join(directory, f"{name}.snap"), name, rows, version, offsets)
+            print(f"  {name}: {len(rows):,} rows from {spec['source']}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def event_to_delta(row):
+    """Map a FLIGHT_STATUS_EVENTS row to a Golden Record field update"""
+    partition, offset, flight_id, new_status, delay_minutes, actual_departure = row
+    values = {}
+    if new_status:
+        values['flight_status'] = new_status
+    if delay_minutes is not None:
+        values['departure_delay_minutes'] = delay_minutes
+    if actual_departure is not None:
+        values['actual_departure_utc'] = actual_departure
+    return {'op': 'upsert', 'key': flight_id, 'values': values, 'offset': [partition, offset]}
+
+
+def catch_up(snapshot, database):
+    """Append streamed events past the recorded Kafka offsets to the delta log"""
+    offsets = snapshot.offsets
+    clauses = [f"(kafka_partition = {int(p)} AND kafka_offset > {int(o)})" for p, o in offsets.items()]
+    if offsets:
+        clauses.append(f"kafka_partition NOT IN ({', '.join(str(int(p)) for p in offsets)})")
+    conn = _connect()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT kafka_partition, kafka_offset, flight_id, new_status, delay_minutes, "
+            f"actual_departure_utc FROM {database}.RAW.FLIGHT_STATUS_EVENTS "
+            f"WHERE kafka_partition IS NOT NULL{' AND (' + ' OR '.join(clauses) + ')' if clauses else ''} "
+            f"ORDER BY kafka_partition, kafka_offset")
+        records = [event_to_delta(row) for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+    # Only flights in today's snapshot are operational state
+    golden = snapshot['golden_record']
+    records = [r for r in records if golden.get(r['key']) is not None and r['values']]
+    if records:
+        golden.apply(records)
+    return len(records)
+
+
+def build_demo(directory, flights, version, seed=7):
+    """Synthetic day at airline volumes, for measuring cold start without Snowflake"""
+    rng = random.Random(seed)
+    airports = ['ATL', 'DFW', 'ORD', 'LAX', 'JFK', 'DEN', 'SEA', 'MSP', 'DTW', 'BOS', 'LGA', 'SLC']
+    types = ['A320', 'A321', 'B737', 'B757', 'B767', 'A330', 'A350']
+    statuses = ['SCHEDULED', 'BOARDING', 'DEPARTED', 'EN_ROUTE', 'ARRIVED', 'DELAYED', 'CANCELLED']
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    aircraft = [{
+        'aircraft_id': f"AC{i:05d}", 'tail_number': f"N{i:03d}PH", 'aircraft_type_code': rng.choice(types),
+        'seat_capacity': rng.choice([150, 180, 220, 300]), 'current_location': rng.choice(airports),
+        'status': rng.choice(['ACTIVE', 'ACTIVE', 'ACTIVE', 'MAINTENANCE']),
+        'mel_items_count': rng.randint(0, 3), 'days_until_maintenance': rng.randint(0, 90),
+        'maintenance_health_score': rng.uniform(50, 100), 'is_operationally_available': rng.random() > 0.1,
+    } for i in range(max(flights // 5, 1))]
+    crew = [{
+        'crew_id': f"CR{i:06d}", 'employee_id': f"E{i:06d}", 'full_name': f"Crew Member {i}",
+        'crew_type': rng.choice(['CAPTAIN', 'FIRST_OFFICER', 'FLIGHT_ATTENDANT']),
+        'seniority_number': i, 'base_airport': rng.choice(airports), 'status': 'ACTIVE',
+        'qualified_aircraft_types': ', '.join(rng.sample(types, 2)),
+        'monthly_hours_remaining': rng.uniform(0, 100), 'annual_hours_remaining': rng.uniform(0, 1000),
+        'availability_status': rng.choice(['AVAILABLE', 'ON_DUTY', 'REST', 'NEAR_MONTHLY_LIMIT']),
+    } for i in range(flights // 2)]
+    golden = []
+    for i in range(flights):
+        origin, destination = rng.sample(airports, 2)
+        departure = today + timedelta(minutes=rng.randint(0, 24 * 60 - 1))
+        plane = rng.choice(aircraft)
+        golden.append({
+            'flight_id': f"PH{i:05d}-{today:%Y%m%d}", 'flight_number': f"PH{i % 9000 + 100}",
+            'flight_date': today.date(), 'origin': origin, 'destination': destination,
+            'scheduled_departure_utc': departure,
+            'scheduled_arrival_utc': departure + timedelta(minutes=rng.randint(60, 360)),
+            'actual_departure_utc': None, 'flight_status': rng.choice(statuses),
+            'departure_delay_minutes': rng.choice([0, 0, 0, 15, 30, 90]),
+            'aircraft_id': plane['aircraft_id'], 'tail_number': plane['tail_number'],
+            'aircraft_type_code': plane['aircraft_type_code'], 'aircraft_status': plane['status'],
+            'is_ghost_flight': rng.random() < 0.01, 'captain_id': rng.choice(crew)['crew_id'],
+            'first_officer_id': rng.choice(crew)['crew_id'], 'has_active_disruption': rng.random() < 0.1,
+            'disruption_type': None, 'disruption_severity': None,
+            'passengers_booked': rng.randint(50, 300), 'load_factor': rng.uniform(0.5, 1.0),
+            'total_estimated_cost': rng.uniform(0, 50000), 'needs_captain': False,
+            'needs_first_officer': False, 'flight_health_score': rng.uniform(0, 100),
+            'recovery_priority_score': rng.uniform(0, 100),
+        })
+    offsets = {p: rng.randint(10_000, 100_000) for p in range(4)}
+    for name, rows in (('golden_record', golden), ('crew', crew), ('aircraft', aircraft)):
+        write_snapshot(os.path.join(directory, f"{name}.snap"), name, rows, version, offsets)
+        print(f"  {name}: {len(rows):,} rows (synthetic)")
+
+
+def _current_version(directory):
+    path = os.path.join(directory, 'golden_record.snap')
+    if not os.path.exists(path):
+        return 0
+    base = ColumnarTable(path)
+    try:
+        return base.version
+    finally:
+        base.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['build', 'catch-up', 'compact', 'info'])
+    parser.add_argument('--dir', default='snapshots', help='Snapshot directory')
+    parser.add_argument('--database', default=os.getenv('SNOWFLAKE_DATABASE', 'PHANTOM_IROPS'))
+    parser.add_argument('--demo', action='store_true', help='Build a synthetic snapshot instead of querying Snowflake')
+    parser.add_argument('--flights', type=int, default=50_000, help='Synthetic flights for --demo')
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    if args.command == 'build':
+        version = _current_version(args.dir) + 1
+        started = time.perf_counter()
+        print(f"Building snapshot version {version} in {args.dir}...")
+        if args.demo:
+            build_demo(args.dir, args.flights, version)
+        else:
+            build_from_snowflake(args.dir, args.database, version)
+        for name in TABLES:
+            # A new base version invalidates any deltas logged against the old one
+            wal = os.path.join(args.dir, f"{name}.wal")
+            if os.path.exists(wal):
+                os.remove(wal)
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+        return
+
+    started = time.perf_counter()
+    snapshot = DaySnapshot(args.dir)
+    opened = time.perf_counter() - started
+    try:
+        if args.command == 'catch-up':
+            applied = catch_up(snapshot, args.database)
+            print(f"Logged {applied} flight updates; offsets now {snapshot.offsets}")
+        elif args.command == 'compact':
+            snapshot.compact()
+            print(f"Compacted to version {snapshot['golden_record'].base.version}")
+        else:
+            print(f"Opened {args.dir} in {opened * 1000:.1f} ms")
+            for name, table in snapshot.tables.items():
+                size = os.path.getsize(table.base.path)
+                print(f"  {name:<14} v{table.base.version}  {len(table.base):>8,} rows  "
+                      f"{size / 1e6:>7.1f} MB  {len(table.wal.records):>6} deltas")
+            print(f"  Kafka offsets: {snapshot.offsets}")
+    finally:
+        snapshot.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Dynamic Table refresh DAG profiler and TARGET_LAG / warehouse planner
+
+Parses the Dynamic Table chain out of scripts/04_dynamic_tables.sql, profiles
+an exported refresh history (INFORMATION_SCHEMA.DYNAMIC_TABLE_REFRESH_HISTORY
+saved as CSV or JSON lines) and recommends the cheapest lag/warehouse layout
+that keeps the Golden Record inside a freshness SLO.
+
+Usage:
+    python3 tools/dt_lag_planner.py --history refresh_history.csv
+    python3 tools/dt_lag_planner.py --history refresh_history.csv --slo 15m
+    python3 tools/dt_lag_planner.py --history refresh_history.csv --simulate STG_WEATHER=10m:SMALL
+
+Freshness model: a node can be at most TARGET_LAG plus one refresh behind its
+inputs, and those inputs can themselves be that far behind theirs. The
+end-to-end bound reported here is the worst such sum along any path, which
+is pessimistic when the scheduler aligns refreshes across the chain.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCRIPTS = [os.path.join(REPO_ROOT, 'scripts', '04_dynamic_tables.sql')]
+DEFAULT_TARGET = 'ANALYTICS.MART_GOLDEN_RECORD'
+DEFAULT_WAREHOUSE_SIZE = 'MEDIUM'  # deploy.sh default
+
+# Standard warehouse credits per hour
+WAREHOUSE_CREDITS = {
+    'XSMALL': 1, 'SMALL': 2, 'MEDIUM': 4, 'LARGE': 8,
+    'XLARGE': 16, '2XLARGE': 32, '3XLARGE': 64, '4XLARGE': 128,
+}
+
+CANDIDATE_LAGS = [60, 120, 300, 600, 900, 1800, 3600]
+CANDIDATE_SIZES = ['XSMALL', 'SMALL', 'MEDIUM', 'LARGE']
+
+# Fraction of ideal speed-up gained per warehouse size step
+SCALING_EFFICIENCY = 0.8
+
+# Assumed refresh duration for tables with no rows in the history export
+DEFAULT_REFRESH_SECONDS = 60
+
+LAG_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+DT_PATTERN = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?DYNAMIC\s+TABLE\s+([\w.]+)\s+"
+    r"TARGET_LAG\s*=\s*'(\d+)\s*(second|minute|hour|day)s?'\s+"
+    r"WAREHOUSE\s*=\s*(\w+)",
+    re.IGNORECASE,
+)
+STATEMENT_PATTERN = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?\w+", re.IGNORECASE)
+SOURCE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*\.[A-Za-z_]\w*)", re.IGNORECASE)
+
+
+class DynamicTable:
+    """One node of the refresh DAG"""
+
+    def __init__(self, name, target_lag_s, warehouse, upstream=()):
+        self.name = name
+        self.target_lag_s = target_lag_s
+        self.warehouse = warehouse
+        self.upstream = set(upstream)
+
+
+def parse_lag(text):
+    """Parse '5m', '90s', '1h' or '5 minutes' into seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", text)
+    if not match:
+        raise ValueError(f"Unrecognised lag: {text!r}")
+    value, unit = float(match.group(1)), match.group(2).lower().rstrip('s') or 'second'
+    aliases = {'': 'second', 'sec': 'second', 'm': 'minute', 'min': 'minute',
+               'h': 'hour', 'hr': 'hour', 'd': 'day'}
+    unit = aliases.get(unit, unit)
+    if unit not in LAG_UNITS:
+        raise ValueError(f"Unrecognised lag unit: {text!r}")
+    return int(value * LAG_UNITS[unit])
+
+
+def format_lag(seconds):
+    """Format seconds the way TARGET_LAG is written"""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds:.0f}s"
+
+
+def parse_dag(paths):
+    """Extract Dynamic Tables and their upstream Dynamic Tables from SQL scripts"""
+    tables = {}
+    sources = {}
+    for path in paths:
+        with open(path) as f:
+            sql = re.sub(r"--[^\n]*", '', f.read())
+        starts = [m.start() for m in STATEMENT_PATTERN.finditer(sql)] + [len(sql)]
+        for begin, end in zip(starts, starts[1:]):
+            statement = sql[begin:end]
+            match = DT_PATTERN.match(statement)
+            if not match:
+                continue
+            name = match.group(1).upper()
+            lag = int(match.group(2)) * LAG_UNITS[match.group(3).lower()]
+            tables[name] = DynamicTable(name, lag, match.group(4).upper())
+            sources[name] = {s.upper() for s in SOURCE_PATTERN.findall(statement[match.end():])}
+    for name, table in tables.items():
+        # RAW tables are base tables; only Dynamic Tables are DAG edges
+        table.upstream = {s for s in sources[name] if s in tables and s != name}
+    return tables
+
+
+def topological_order(tables):
+    """Return table names with every node after its upstream nodes"""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for parent in sorted(tables[name].upstream):
+            visit(parent)
+        order.append(name)
+
+    for name in sorted(tables):
+        visit(name)
+    return order
+
+
+def ancestors(tables, name):
+    """All nodes the given node reads from, directly or transitively, plus itself"""
+    found, stack = set(), [name]
+    while stack:
+        node = stack.pop()
+        if node not in found:
+            found.add(node)
+            stack.extend(tables[node].upstream)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Refresh history
+# ---------------------------------------------------------------------------
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    value = value.strip().replace('Z', '+00:00')
+    # Snowflake exports use '2026-03-18 01:07:00.123 -0700'
+    value = re.sub(r"\s*([+-])(\d{2}):?(\d{2})$", r"\1\2:\3", value)
+    return datetime.fromisoformat(value)
+
+
+def load_history(path):
+    """Load a refresh-history export (CSV, JSON array or JSON lines)"""
+    with open(path) as f:
+        text = f.read()
+    if path.lower().endswith('.csv'):
+        rows = list(csv.DictReader(text.splitlines()))
+    elif text.lstrip().startswith('['):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    records = []
+    for row in rows:
+        row = {k.upper(): v for k, v in row.items()}
+        name = (row.get('QUALIFIED_NAME') or row.get('NAME') or '').upper()
+        start = _parse_timestamp(row.get('REFRESH_START_TIME'))
+        end = _parse_timestamp(row.get('REFRESH_END_TIME'))
+        if not name or start is None or end is None:
+            continue
+        credits = row.get('CREDITS') or row.get('CREDITS_USED')
+        records.append({
+            'name': name,
+            'start': start,
+            'end': end,
+            'duration_s': max((end - start).total_seconds(), 0.0),
+            'action': (row.get('REFRESH_ACTION') or 'INCREMENTAL').upper(),
+            'state': (row.get('STATE') or 'SUCCEEDED').upper(),
+            'data_timestamp': _parse_timestamp(row.get('DATA_TIMESTAMP')),
+            'credits': float(credits) if credits not in (None, '') else None,
+        })
+    return records
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _resolve(tables, history_name):
+    """Map a history NAME / QUALIFIED_NAME onto a DAG node"""
+    parts = history_name.split('.')
+    for size in (2, 1):
+        suffix = '.'.join(parts[-size:])
+        matches = [n for n in tables if n == suffix or n.endswith('.' + suffix)]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def profile(tables, records, warehouse_size=DEFAULT_WAREHOUSE_SIZE,
+            default_duration_s=DEFAULT_REFRESH_SECONDS):
+    """Summarise refresh history per Dynamic Table
+
+    Tables without successful refreshes in the export are estimated as one
+    default_duration_s refresh per TARGET_LAG and flagged 'profiled': False,
+    so the planner never treats them as free.
+    """
+    grouped = defaultdict(list)
+    for record in records:
+        node = _resolve(tables, record['name'])
+        if node:
+            grouped[node].append(record)
+
+    stats = {}
+    for name, table in tables.items():
+        runs = [r for r in grouped.get(name, []) if r['state'] == 'SUCCEEDED']
+        durations = [r['duration_s'] for r in runs if r['action'] != 'NO_DATA']
+        full = sum(1 for r in runs if r['action'] in ('FULL', 'REINITIALIZE'))
+        incremental = sum(1 for r in runs if r['action'] == 'INCREMENTAL')
+        if runs:
+            span_h = max((max(r['end'] for r in runs) - min(r['start'] for r in runs)).total_seconds() / 3600, 1 / 60)
+        else:
+            span_h = 0.0
+        credits_per_hour = WAREHOUSE_CREDITS[warehouse_size]
+        credits = sum(
+            r['credits'] if r['credits'] is not None
+            else credits_per_hour * r['duration_s'] / 3600
+            for r in runs
+        )
+        observed_lags = [
+            (r['end'] - r['data_timestamp']).total_seconds()
+            for r in runs if r['data_timestamp'] is not None
+        ]
+        if not runs:
+            refreshes_per_hour = 3600 / table.target_lag_s
+            estimated_credits_per_hour = \
+                refreshes_per_hour * default_duration_s * credits_per_hour / 3600
+            stats[name] = {
+                'profiled': False,
+                'refreshes': 0,
+                'failed': len(grouped.get(name, [])),
+                'refreshes_per_hour': refreshes_per_hour,
+                'p50_duration_s': float(default_duration_s),
+                'p95_duration_s': float(default_duration_s),
+                'full_ratio': 0.0,
+                'credits': 0.0,
+                'credits_per_hour': estimated_credits_per_hour,
+                'observed_max_lag_s': None,
+            }
+            continue
+        stats[name] = {
+            'profiled': True,
+            'refreshes': len(runs),
+            'failed': len(grouped.get(name, [])) - len(runs),
+            'refreshes_per_hour': len(runs) / span_h if span_h else 0.0,
+            'p50_duration_s': _percentile(durations, 50),
+            'p95_duration_s': _percentile(durations, 95),
+            'full_ratio': full / (full + incremental) if full + incremental else 0.0,
+            'credits': credits,
+            'credits_per_hour': credits / span_h if span_h else 0.0,
+            'observed_max_lag_s': max(observed_lags) if observed_lags else None,
+        }
+
+    total = sum(s['credits_per_hour'] for s in stats.values())
+    for s in stats.values():
+        s['cost_share'] = s['credits_per_hour'] / total if total else 0.0
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Freshness and cost model
+# ---------------------------------------------------------------------------
+
+def current_config(tables, warehouse_size=DEFAULT_WAREHOUSE_SIZE):
+    return {name: (t.target_lag_s, warehouse_size) for name, t in tables.items()}
+
+
+def scaled_duration(duration_s, from_size, to_size):
+    """Estimate refresh duration after moving to a different warehouse size"""
+    ratio = WAREHOUSE_CREDITS[from_size] / WAREHOUSE_CREDITS[to_size]
+    return duration_s * ratio ** SCALING_EFFICIENCY
+
+
+def node_cost(stats, table, lag_s, size, baseline_size):
+    """Credits per hour for one node under a lag/warehouse assignment
+
+    Scales the observed spend: refresh frequency follows TARGET_LAG, and a
+    bigger warehouse burns more credits per second but finishes sooner.
+    """
+    observed = stats[table.name]['credits_per_hour']
+    size_ratio = WAREHOUSE_CREDITS[size] / WAREHOUSE_CREDITS[baseline_size]
+    return observed * table.target_lag_s / lag_s * size_ratio ** (1 - SCALING_EFFICIENCY)
+
+
+def node_staleness(stats, table, lag_s, size, baseline_size):
+    """Worst-case seconds a node trails its inputs"""
+    return lag_s + scaled_duration(stats[table.name]['p95_duration_s'], baseline_size, size)
+
+
+def freshness(tables, stats, config, baseline_size, target=None):
+    """End-to-end staleness bound per node and the critical path to target"""
+    bound, via = {}, {}
+    for name in topological_order(tables):
+        table = tables[name]
+        lag_s, size = config[name]
+        upstream = max(table.upstream, key=lambda n: bound[n], default=None)
+        bound[name] = node_staleness(stats, table, lag_s, size, baseline_size) + \
+            (bound[upstream] if upstream else 0.0)
+        via[name] = upstream
+    path = []
+    node = target
+    while node:
+        path.append(node)
+        node = via[node]
+    return bound, list(reversed(path))
+
+
+def total_cost(tables, stats, config, baseline_size):
+    return sum(node_cost(stats, tables[n], *config[n], baseline_size) for n in tables)
+
+
+def enforce_lag_order(tables, config):
+    """Raise downstream lags so no node refreshes faster than its inputs"""
+    fixed = dict(config)
+    for name in topological_order(tables):
+        floor = max((fixed[p][0] for p in tables[name].upstream), default=0)
+        if fixed[name][0] < floor:
+            fixed[name] = (floor, fixed[name][1])
+    return fixed
+
+
+def recommend(tables, stats, slo_s, target=DEFAULT_TARGET, baseline_size=DEFAULT_WAREHOUSE_SIZE,
+              lags=CANDIDATE_LAGS, sizes=CANDIDATE_SIZES):
+    """Cheapest lag/warehouse assignment whose target bound meets the SLO
+
+    Branch and bound over the target's ancestors in topological order. Each
+    node's options are pruned to a cost/staleness Pareto frontier per lag
+    first, so the search stays small for the handful of tables in the chain.
+    Options only compete within the same lag: a node's lag must be at least
+    its parents' and is the floor for its children, so a longer lag can force
+    costlier options downstream and a shorter one can be infeasible.
+    """
+    scope = [n for n in topological_order(tables) if n in ancestors(tables, target)]
+    options = {}
+    for name in scope:
+        table = tables[name]
+        candidates = sorted(
+            (node_staleness(stats, table, lag, size, baseline_size),
+             node_cost(stats, table, lag, size, baseline_size), lag, size)
+            for lag in lags for size in sizes
+        )
+        frontier = []
+        for option in candidates:
+            # Sorted by staleness, so only options already kept can dominate
+            if not any(kept[1] <= option[1] and kept[2] == option[2] for kept in frontier):
+                frontier.append(option)
+        options[name] = frontier
+
+    min_remaining = [0.0] * (len(scope) + 1)
+    for i in range(len(scope) - 1, -1, -1):
+        min_remaining[i] = min_remaining[i + 1] + min(o[1] for o in options[scope[i]])
+
+    best = {'cost': math.inf, 'config': None}
+
+    def search(i, chosen, arrival, cost):
+        if cost + min_remaining[i] >= best['cost']:
+            return
+        if i == len(scope):
+            best['cost'], best['config'] = cost, dict(chosen)
+            return
+        name = scope[i]
+        parents = tables[name].upstream & set(chosen)
+        reach = max((arrival[p] for p in parents), default=0.0)
+        lag_floor = max((chosen[p][0] for p in parents), default=0)
+        for staleness, option_cost, lag, size in options[name]:
+            if lag < lag_floor or reach + staleness > slo_s:
+                continue
+            chosen[name] = (lag, size)
+            arrival[name] = reach + staleness
+            search(i + 1, chosen, arrival, cost + option_cost)
+            del chosen[name], arrival[name]
+
+    search(0, {}, {}, 0.0)
+    if best['config'] is None:
+        return None
+    config = current_config(tables, baseline_size)
+    config.update(best['config'])
+    return enforce_lag_order(tables, config)
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def describe(tables, stats, config, baseline_size, target):
+    bound, path = freshness(tables, stats, config, baseline_size, target)
+    return {
+        'target': target,
+        'end_to_end_bound_s': round(bound[target], 1),
+        'critical_path': path,
+        'credits_per_hour': round(total_cost(tables, stats, config, baseline_size), 3),
+        'unprofiled': [n for n in topological_order(tables) if not stats[n]['profiled']],
+        'nodes': {
+            name: {
+                'target_lag': format_lag(config[name][0]),
+                'warehouse_size': config[name][1],
+                'credits_per_hour': round(node_cost(stats, tables[name], *config[name], baseline_size), 3),
+                'estimated': not stats[name]['profiled'],
+            }
+            for name in topological_order(tables)
+        },
+    }
+
+
+def print_profile(tables, stats, warehouse_size):
+    print(f"{'DYNAMIC TABLE':<45} {'LAG':>5} {'RUNS':>6} {'P95 s':>7} {'FULL%':>6} {'CR/H':>7} {'SHARE':>6}")
+    for name in topological_order(tables):
+        s = stats[name]
+        print(f"{name:<45} {format_lag(tables[name].target_lag_s):>5} {s['refreshes']:>6} "
+              f"{s['p95_duration_s']:>7.1f} {s['full_ratio'] * 100:>5.0f}% "
+              f"{s['credits_per_hour']:>7.3f} {s['cost_share'] * 100:>5.1f}%"
+              f"{'' if s['profiled'] else '  UNPROFILED (estimated)'}")
+    print(f"(unmetered refreshes costed on a {warehouse_size} warehouse)")
+    unprofiled = [n for n in tables if not stats[n]['profiled']]
+    if unprofiled:
+        print(f"WARNING: {len(unprofiled)} table(s) have no refresh history; duration and cost "
+              f"are estimated from --default-refresh, so plans touching them are approximate")
+
+
+def print_plan(label, plan, baseline):
+    print(f"\n{label}")
+    print(f"  {plan['target']} bound: {format_lag(round(plan['end_to_end_bound_s']))}"
+          f" | {plan['credits_per_hour']:.3f} credits/h")
+    print(f"  Critical path: {' -> '.join(n.split('.')[-1] for n in plan['critical_path'])}")
+    for name, node in plan['nodes'].items():
+        before = baseline['nodes'][name]
+        changed = (node['target_lag'], node['warehouse_size']) != \
+            (before['target_lag'], before['warehouse_size'])
+        marker = '*' if changed else ' '
+        print(f"  {marker} {name:<45} {node['target_lag']:>5} {node['warehouse_size']:<7}"
+              f" {node['credits_per_hour']:>7.3f} cr/h{' (est.)' if node['estimated'] else ''}")
+
+
+def parse_overrides(tables, values, config):
+    """Apply NAME=LAG[:SIZE] overrides to a config"""
+    config = dict(config)
+    for value in values:
+        name, _, spec = value.partition('=')
+        node = _resolve(tables, name.upper())
+        if node is None:
+            raise SystemExit(f"Unknown Dynamic Table: {name}")
+        lag, _, size = spec.partition(':')
+        size = size.upper() or config[node][1]
+        if size not in WAREHOUSE_CREDITS:
+            raise SystemExit(f"Unknown warehouse size: {size}")
+        config[node] = (parse_lag(lag) if lag else config[node][0], size)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', required=True, help='Refresh history export (CSV / JSON / JSONL)')
+    parser.add_argument('--scripts', nargs='+', default=DEFAULT_SCRIPTS, help='SQL scripts defining the DAG')
+    parser.add_argument('--target', default=DEFAULT_TARGET, help='Table the SLO applies to')
+    parser.add_argument('--slo', default='10m', help='Freshness SLO for the target, e.g. 10m')
+    parser.add_argument('--warehouse-size', default=DEFAULT_WAREHOUSE_SIZE, choices=sorted(WAREHOUSE_CREDITS))
+    parser.add_argument('--default-refresh', default=f'{DEFAULT_REFRESH_SECONDS}s',
+                        help='Assumed refresh duration for tables missing from the history')
+    parser.add_argument('--simulate', nargs='*', default=[], metavar='NAME=LAG[:SIZE]',
+                        help='Evaluate an alternative assignment, e.g. STG_WEATHER=10m:SMALL')
+    parser.add_argument('--json', action='store_true', help='Emit the report as JSON')
+    args = parser.parse_args()
+
+    tables = parse_dag(args.scripts)
+    target = _resolve(tables, args.target.upper())
+    if target is None:
+        raise SystemExit(f"Target {args.target} not found in {', '.join(args.scripts)}")
+    stats = profile(tables, load_history(args.history), args.warehouse_size,
+                    parse_lag(args.default_refresh))
+    slo_s = parse_lag(args.slo)
+
+    config = current_config(tables, args.warehouse_size)
+    report = {
+        'profile': stats,
+        'current': describe(tables, stats, config, args.warehouse_size, target),
+        'slo_s': slo_s,
+    }
+    if args.simulate:
+        simulated = enforce_lag_order(tables, parse_overrides(tables, args.simulate, config))
+        report['simulated'] = describe(tables, stats, simulated, args.warehouse_size, target)
+    recommended = recommend(tables, stats, slo_s, target, args.warehouse_size)
+    report['recommended'] = describe(tables, stats, recommended, args.warehouse_size, target) \
+        if recommended else None
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    print_profile(tables, stats, args.warehouse_size)
+    print_plan('Current configuration', report['current'], report['current'])
+    if 'simulated' in report:
+        print_plan('Simulated configuration', report['simulated'], report['current'])
+    if report['recommended']:
+        print_plan(f"Cheapest configuration meeting {format_lag(slo_s)} SLO",
+                   report['recommended'], report['current'])
+    else:
+        print(f"\nNo candidate configuration keeps {target} within {format_lag(slo_s)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Push-based live flight event fan-out server
+
+Tails RAW.FLIGHT_EVENTS_STREAMING once, enriches each event from a cached
+RAW.FLIGHTS lookup and pushes it to every connected controller over SSE or
+WebSocket. Warehouse load is one incremental query per poll interval no
+matter how many browsers are watching, instead of one ORDER BY ... LIMIT
+query per browser per poll from /api/events.
+
+Usage:
+    python3 tools/event_fanout.py                       # Tail Snowflake
+    python3 tools/event_fanout.py --demo                # Synthetic events, no Snowflake
+    python3 tools/event_fanout.py --port 8765 --poll-interval 1
+
+Endpoints:
+    GET /events?event_type=DELAY_UPDATE&airport=ATL    Server-Sent Events
+    GET /ws?flight=PH1234&policy=coalesce              WebSocket (server push only)
+    GET /stats                                         Fan-out counters (JSON)
+
+Filters take comma-separated values. Each subscriber has a bounded queue
+(?queue=N) with a slow-consumer policy (?policy=):
+    drop_oldest   discard the oldest queued event (default)
+    drop_newest   discard the incoming event
+    coalesce      keep only the latest queued event per flight
+Reconnecting clients send Last-Event-ID (or ?since=N) and are replayed the
+missed events from an in-memory ring buffer.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_RING_SIZE = 5000
+DEFAULT_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+WS_MAGIC = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+EVENT_COLUMNS = [
+    'EVENT_ID', 'FLIGHT_ID', 'EVENT_TYPE', 'EVENT_TIMESTAMP', 'NEW_STATUS',
+    'PREVIOUS_STATUS', 'DELAY_MINUTES', 'DELAY_CODE', 'DELAY_REASON',
+    'DEPARTURE_GATE', 'ARRIVAL_GATE', 'SOURCE_SYSTEM',
+]
+FLIGHT_COLUMNS = ['FLIGHT_NUMBER', 'ORIGIN', 'DESTINATION', 'SCHEDULED_DEPARTURE_UTC']
+
+
+def _connect():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        connection_name=os.getenv("SNOWFLAKE_CONNECTION_NAME") or "USWEST_DEMOACCOUNT")
+
+
+def _jsonable(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class FlightLookup:
+    """Cached FLIGHT_ID -> flight attributes, bulk loaded and topped up on miss"""
+
+    def __init__(self, conn, database='PHANTOM_IROPS'):
+        self.conn = conn
+        self.database = database
+        self.flights = {}
+        self.queries = 0
+
+    def _load(self, where, params=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                f"SELECT FLIGHT_ID, {', '.join(FLIGHT_COLUMNS)} "
+                f"FROM {self.database}.RAW.FLIGHTS WHERE {where}", params)
+            for row in cur:
+                self.flights[row[0]] = {c: _jsonable(v) for c, v in zip(FLIGHT_COLUMNS, row[1:])}
+        finally:
+            cur.close()
+        self.queries += 1
+
+    def preload(self):
+        """Cache the operating window so steady-state enrichment needs no queries"""
+        self._load("FLIGHT_DATE BETWEEN DATEADD('day', -1, CURRENT_DATE()) "
+                   "AND DATEADD('day', 1, CURRENT_DATE())")
+
+    def enrich(self, events):
+        missing = sorted({e['FLIGHT_ID'] for e in events} - self.flights.keys())
+        if missing:
+            placeholders = ', '.join(['%s'] * len(missing))
+            self._load(f"FLIGHT_ID IN ({placeholders})", missing)
+            for flight_id in missing:
+                # Remember unknown flights so they are not re-queried every poll
+                self.flights.setdefault(flight_id, dict.fromkeys(FLIGHT_COLUMNS))
+        for event in events:
+            event.update(self.flights[event['FLIGHT_ID']])
+        return events
+
+
+class SnowflakeEventSource:
+    """Incrementally tails FLIGHT_EVENTS_STREAMING in Kafka ingest order
+
+    The cursor is the last delivered offset per Kafka partition, read from
+    RECORD_METADATA. Event time is not a safe watermark: the connector buffers
+    and rows land out of EVENT_TIMESTAMP order, and (partition, offset) is
+    unique, so late rows and same-timestamp bursts are never skipped.
+    """
+
+    PARTITION = 'RECORD_METADATA:partition::INTEGER'
+    OFFSET = 'RECORD_METADATA:offset::INTEGER'
+    CREATE_TIME = 'RECORD_METADATA:CreateTime::NUMBER'
+
+    def __init__(self, database='PHANTOM_IROPS', batch_size=1000, backfill=100):
+        self.conn = _connect()
+        self.database = database
+        self.batch_size = batch_size
+        self.backfill = backfill
+        self.lookup = FlightLookup(self.conn, database)
+        self.offsets = None
+        self.queries = 0
+
+    def _query(self, sql, params=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+        self.queries += 1
+        return rows
+
+    def _events(self, rows):
+        """Split (columns..., partition, offset, create_time) rows into events + positions"""
+        events = []
+        for row in rows:
+            event = {c: _jsonable(v) for c, v in zip(EVENT_COLUMNS, row)}
+            partition, offset, create_time = row[len(EVENT_COLUMNS):]
+            events.append((create_time or 0, partition, offset, event))
+        events.sort(key=lambda e: e[:3])
+        return events
+
+    def _fetch(self):
+        table = f"{self.database}.RAW.FLIGHT_EVENTS_STREAMING"
+        columns = ', '.join(EVENT_COLUMNS + [self.PARTITION, self.OFFSET, self.CREATE_TIME])
+        if self.offsets is None:
+            self.lookup.preload()
+            # Start the cursor at the current end of every partition, then
+            # replay the most recent rows as backfill
+            self.offsets = {
+                partition: offset for partition, offset in self._query(
+                    f"SELECT {self.PARTITION}, MAX({self.OFFSET}) FROM {table} GROUP BY 1")
+                if partition is not None
+            }
+            rows = self._query(
+                f"SELECT {columns} FROM {table} "
+                f"ORDER BY {self.CREATE_TIME} DESC, {self.PARTITION}, {self.OFFSET} DESC LIMIT %s",
+                (self.backfill,))
+            events = [e[3] for e in self._events(rows)]
+            return self.lookup.enrich(events)
+
+        known = sorted(self.offsets)
+        clauses = [f"({self.PARTITION} = %s AND {self.OFFSET} > %s)" for _ in known]
+        params = [v for p in known for v in (p, self.offsets[p])]
+        if known:
+            clauses.append(f"{self.PARTITION} NOT IN ({', '.join(['%s'] * len(known))})")
+            params.extend(known)
+        where = ' OR '.join(clauses) or 'TRUE'
+        # Up to batch_size rows per partition, contiguous from the cursor, so
+        # one busy partition cannot starve the others
+        rows = self._query(
+            f"SELECT {columns} FROM {table} WHERE {where} "
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {self.PARTITION} ORDER BY {self.OFFSET}) <= %s",
+            params + [self.batch_size])
+
+        cursor = dict(self.offsets)
+        events = []
+        for _, partition, offset, event in self._events(rows):
+            if partition is None or offset <= cursor.get(partition, -1):
+                continue
+            self.offsets[partition] = max(offset, self.offsets.get(partition, -1))
+            events.append(event)
+        return self.lookup.enrich(events)
+
+    async def poll(self):
+        return await asyncio.to_thread(self._fetch)
+
+    def stats(self):
+        return {'event_queries': self.queries, 'flight_queries': self.lookup.queries,
+                'cached_flights': len(self.lookup.flights), 'offsets': self.offsets}
+
+
+class DemoEventSource:
+    """Synthetic enriched events for running the server without Snowflake"""
+
+    AIRPORTS = ['ATL', 'DFW', 'ORD', 'LAX', 'JFK', 'DEN', 'SEA', 'MSP', 'DTW', 'BOS']
+    EVENT_TYPES = ['STATUS_CHANGE', 'DELAY_UPDATE', 'GATE_CHANGE', 'DEPARTURE', 'ARRIVAL']
+
+    def __init__(self, rate=20, flights=200, seed=None):
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.counter = 0
+        self.last = time.monotonic()
+        self.flights = {}
+        for i in range(flights):
+            origin, destination = self.random.sample(self.AIRPORTS, 2)
+            self.flights[f"PH{1000 + i}-{datetime.utcnow():%Y%m%d}"] = {
+                'FLIGHT_NUMBER': f"PH{1000 + i}", 'ORIGIN': origin, 'DESTINATION': destination,
+                'SCHEDULED_DEPARTURE_UTC': (datetime.utcnow() + timedelta(minutes=5 * i)).isoformat(),
+            }
+        self.flight_ids = list(self.flights)
+
+    async def poll(self):
+        now = time.monotonic()
+        count = int((now - self.last) * self.rate)
+        self.last += count / self.rate
+        events = []
+        for _ in range(count):
+            self.counter += 1
+            flight_id = self.random.choice(self.flight_ids)
+            event_type = self.random.choice(self.EVENT_TYPES)
+            delay = self.random.choice([15, 30, 45, 90]) if event_type == 'DELAY_UPDATE' else None
+            events.append({
+                'EVENT_ID': f"EVT{self.counter:09d}", 'FLIGHT_ID': flight_id, 'EVENT_TYPE': event_type,
+                'EVENT_TIMESTAMP': datetime.utcnow().isoformat(),
+                'NEW_STATUS': 'DELAYED' if delay else None, 'PREVIOUS_STATUS': None,
+                'DELAY_MINUTES': delay, 'DELAY_CODE': None, 'DELAY_REASON': None,
+                'DEPARTURE_GATE': f"{self.random.choice('ABCD')}{self.random.randint(1, 40)}"
+                if event_type == 'GATE_CHANGE' else None,
+                'ARRIVAL_GATE': None, 'SOURCE_SYSTEM': 'DEMO', **self.flights[flight_id],
+            })
+        return events
+
+    def stats(self):
+        return {'event_queries': 0, 'flight_queries': 0, 'cached_flights': len(self.flights)}
+
+
+# ---------------------------------------------------------------------------
+# Broker
+# ---------------------------------------------------------------------------
+
+def _split(values):
+    found = set()
+    for value in values or []:
+        found.update(v.strip().upper() for v in value.split(',') if v.strip())
+    return found
+
+
+class Subscription:
+    """A subscriber's filters and bounded outbound queue"""
+
+    def __init__(self, event_types=(), airports=(), flights=(), maxsize=DEFAULT_QUEUE_SIZE,
+                 policy='drop_oldest'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.event_types = set(event_types)
+        self.airports = set(airports)
+        self.flights = set(flights)
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        # Keyed by FLIGHT_ID when coalescing, by sequence number otherwise
+        self.pending = OrderedDict()
+        self.ready = asyncio.Event()
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def matches(self, event):
+        if self.event_types and event.get('EVENT_TYPE') not in self.event_types:
+            return False
+        if self.airports and not {event.get('ORIGIN'), event.get('DESTINATION')} & self.airports:
+            return False
+        if self.flights and not {event.get('FLIGHT_ID'), event.get('FLIGHT_NUMBER')} & self.flights:
+            return False
+        return True
+
+    def offer(self, seq, event):
+        """Queue an event without blocking the publisher"""
+        if not self.matches(event):
+            return
+        key = event['FLIGHT_ID'] if self.policy == 'coalesce' else seq
+        if key in self.pending:
+            # Re-append so queued sequence numbers stay ascending for Last-Event-ID
+            del self.pending[key]
+            self.coalesced += 1
+        elif len(self.pending) >= self.maxsize:
+            if self.policy == 'drop_newest':
+                self.dropped += 1
+                return
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[key] = (seq, event)
+        self.ready.set()
+
+    async def get(self, timeout=None):
+        """Next (seq, event), or None if nothing arrived within timeout"""
+        if not self.pending:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self.delivered += 1
+        return self.pending.popitem(last=False)[1]
+
+    def stats(self):
+        return {'policy': self.policy, 'queued': len(self.pending), 'delivered': self.delivered,
+                'dropped': self.dropped, 'coalesced': self.coalesced}
+
+
+class Broker:
+    """Sequences events, keeps a replay ring buffer and fans out to subscribers"""
+
+    def __init__(self, ring_size=DEFAULT_RING_SIZE):
+        self.ring = deque(maxlen=ring_size)
+        self.seq = 0
+        self.subscribers = set()
+        self.published = 0
+
+    def publish(self, event):
+        self.seq += 1
+        self.published += 1
+        self.ring.append((self.seq, event))
+        for subscription in self.subscribers:
+            subscription.offer(self.seq, event)
+
+    def subscribe(self, subscription, since=None):
+        """Register a subscriber, replaying buffered events after `since`
+
+        Returns False when `since` is older than the ring buffer, i.e. the
+        client missed events that can no longer be replayed.
+        """
+        complete = True
+        if since is not None:
+            oldest = self.ring[0][0] if self.ring else self.seq + 1
+            complete = since >= oldest - 1
+            for seq, event in self.ring:
+                if seq > since:
+                    subscription.offer(seq, event)
+        self.subscribers.add(subscription)
+        return complete
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+
+async def run_tail(source, broker, interval):
+    """Single poller shared by every subscriber"""
+    while True:
+        started = time.monotonic()
+        try:
+            for event in await source.poll():
+                broker.publish(event)
+        except Exception as exc:  # keep serving cached clients through warehouse hiccups
+            print(f"Poll failed: {exc}")
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+# ---------------------------------------------------------------------------
+# HTTP / SSE / WebSocket
+# ---------------------------------------------------------------------------
+
+class FanoutServer:
+
+    def __init__(self, broker, source, queue_size=DEFAULT_QUEUE_SIZE):
+        self.broker = broker
+        self.source = source
+        self.queue_size = queue_size
+        self.started = time.time()
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2 or request_line[0] != 'GET':
+                return await self._respond(writer, 405, {'error': 'Only GET is supported'})
+            url = urlsplit(request_line[1])
+            params = parse_qs(url.query)
+            if url.path == '/stats':
+                return await self._respond(writer, 200, self.stats())
+            if url.path not in ('/events', '/ws'):
+                return await self._respond(writer, 404, {'error': 'Not found'})
+            try:
+                subscription = Subscription(
+                    event_types=_split(params.get('event_type')),
+                    airports=_split(params.get('airport')),
+                    flights=_split(params.get('flight')),
+                    maxsize=int(params.get('queue', [self.queue_size])[0]),
+                    policy=params.get('policy', ['drop_oldest'])[0],
+                )
+                since = headers.get('last-event-id') or params.get('since', [None])[0]
+                since = int(since) if since is not None else None
+            except ValueError as exc:
+                return await self._respond(writer, 400, {'error': str(exc)})
+            if url.path == '/ws':
+                await self._serve_websocket(reader, writer, headers, subscription, since)
+            else:
+                await self._serve_sse(writer, subscription, since)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body):
+        payload = json.dumps(body).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+        await writer.drain()
+
+    async def _serve_sse(self, writer, subscription, since):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                     b"Connection: keep-alive\r\n\r\nretry: 2000\n\n")
+        if not self.broker.subscribe(subscription, since):
+            writer.write(b"event: reset\ndata: {}\n\n")
+        try:
+            while True:
+                item = await subscription.get(HEARTBEAT_SECONDS)
+                if item is None:
+                    writer.write(b": heartbeat\n\n")
+                else:
+                    seq, event = item
+                    writer.write(f"id: {seq}\nevent: flight_event\ndata: {json.dumps(event)}\n\n".encode())
+                await writer.drain()
+        finally:
+            self.broker.unsubscribe(subscription)
+
+    async def _serve_websocket(self, reader, writer, headers, subscription, since):
+        key = headers.get('sec-websocket-key')
+        if not key or headers.get('upgrade', '').lower() != 'websocket':
+            return await self._respond(writer, 400, {'error': 'WebSocket upgrade required'})
+        accept = base64.b64encode(hashlib.sha1((key + WS_MAGIC).encode()).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+        if not self.broker.subscribe(subscription, since):
+            writer.write(_ws_frame(json.dumps({'type': 'reset'})))
+        closed = asyncio.ensure_future(_ws_wait_closed(reader))
+        try:
+            while not closed.done():
+                item = await subscription.get(HEARTBEAT_SECONDS)
+                if item is None:
+                    writer.write(_ws_frame(b'', opcode=0x9))
+                else:
+                    seq, event = item
+                    writer.write(_ws_frame(json.dumps({'id': seq, 'type': 'flight_event', 'event': event})))
+                await writer.drain()
+        finally:
+            closed.cancel()
+            self.broker.unsubscribe(subscription)
+
+    def stats(self):
+        subscribers = [s.stats() for s in self.broker.subscribers]
+        return {
+            'uptime_s': round(time.time() - self.started),
+            'published': self.broker.published,
+            'last_seq': self.broker.seq,
+            'ring_buffered': len(self.broker.ring),
+            'subscribers': len(subscribers),
+            'dropped': sum(s['dropped'] for s in subscribers),
+            'coalesced': sum(s['coalesced'] for s in subscribers),
+            'source': self.source.stats(),
+        }
+
+
+def _ws_frame(payload, opcode=0x1):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _ws_wait_closed(reader):
+    """Drain client frames until a close frame or EOF"""
+    while True:
+        head = await reader.readexactly(2)
+        opcode, length = head[0] & 0x0F, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await reader.readexactly(8))[0]
+        await reader.readexactly(length + (4 if head[1] & 0x80 else 0))
+        if opcode == 0x8:
+            return
+
+
+async def serve(args):
+    source = DemoEventSource(rate=args.demo_rate) if args.demo else \
+        SnowflakeEventSource(database=args.database)
+    broker = Broker(ring_size=args.ring_size)
+    server = FanoutServer(broker, source, queue_size=args.queue_size)
+    tail = asyncio.ensure_future(run_tail(source, broker, args.poll_interval))
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"Serving flight events on http://{args.host}:{args.port}/events "
+          f"({'demo' if args.demo else args.database} source, poll every {args.poll_interval}s)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        tail.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--database', default=os.getenv('SNOWFLAKE_DATABASE', 'PHANTOM_IROPS'))
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between tail queries')
+    parser.add_argument('--ring-size', type=int, default=DEFAULT_RING_SIZE, help='Events kept for replay')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='Default per-client queue bound')
+    parser.add_argument('--demo', action='store_true', help='Generate synthetic events instead of tailing Snowflake')
+    parser.add_argument('--demo-rate', type=float, default=20, help='Synthetic events per second')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
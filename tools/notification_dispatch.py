@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+High-throughput passenger and crew notification dispatch pipeline
+
+Turns rebooking results (ANALYTICS.REBOOKING_OPTIONS) and crew call-out
+candidates (ML_MODELS.CREW_CANDIDATE_RANKINGS, the source behind
+GENERATE_BATCH_NOTIFICATION_LIST) into delivered messages:
+
+    load -> dedupe (recipient, flight, kind) -> render precompiled template
+         -> personalise premium tiers with one batched Cortex call
+         -> per-channel queue -> batch -> token-bucket rate limit -> send
+         -> retry with backoff / dead-letter
+
+Templates are parsed once and rendered by string joins, so the LLM is only
+on the path for DIAMOND / PLATINUM passengers instead of one
+GENERATE_PASSENGER_NOTIFICATION call per row. Channels are pluggable; the
+local stub channel simulates provider latency and transient failures.
+
+Usage:
+    python3 tools/notification_dispatch.py --demo 20000              # 20k-passenger cancellation
+    python3 tools/notification_dispatch.py --demo 200000 --no-llm
+    python3 tools/notification_dispatch.py --flight PH1234-20261019 --crew-role CAPTAIN
+    python3 tools/notification_dispatch.py --input results.jsonl --sms-rate 5000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import string
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+PREMIUM_TIERS = {'DIAMOND', 'PLATINUM'}
+LLM_MODEL = 'llama3.1-8b'  # Same model as GENERATE_PASSENGER_NOTIFICATION
+
+# (kind, channel) -> template source
+TEMPLATES = {
+    ('rebooked', 'SMS'): (
+        "Phantom Airlines: {first_name}, flight {original_flight_number} {origin}-{destination} is "
+        "{status_text}. We rebooked you on {rebook_flight_number} departing {rebook_time} UTC. "
+        "Conf {confirmation_code}. We're sorry for the disruption."
+    ),
+    ('rebooked', 'EMAIL'): (
+        "Subject: Your new itinerary for {origin} to {destination}\n\n"
+        "Dear {first_name} {last_name},\n\n"
+        "Flight {original_flight_number} from {origin} to {destination} is {status_text}"
+        "{reason_text}. We have rebooked you on flight {rebook_flight_number}, departing "
+        "{rebook_time} UTC. Your confirmation code is {confirmation_code}.\n\n"
+        "We apologise for the inconvenience and thank you for your patience.\n\nPhantom Airlines"
+    ),
+    ('no_option', 'SMS'): (
+        "Phantom Airlines: {first_name}, flight {original_flight_number} {origin}-{destination} is "
+        "{status_text}. An agent will contact you with rebooking options. Conf {confirmation_code}."
+    ),
+    ('no_option', 'EMAIL'): (
+        "Subject: Flight {original_flight_number} update\n\n"
+        "Dear {first_name} {last_name},\n\n"
+        "Flight {original_flight_number} from {origin} to {destination} is {status_text}"
+        "{reason_text}. A Phantom Airlines agent will contact you shortly with rebooking options. "
+        "Your confirmation code is {confirmation_code}.\n\nPhantom Airlines"
+    ),
+    # Wording matches GENERATE_BATCH_NOTIFICATION_LIST
+    ('crew_callout', 'SMS'): (
+        "URGENT: Open trip available. {flight_number} {origin}-{destination} departing "
+        "{departure_time} UTC. Reply YES to accept or call Crew Scheduling."
+    ),
+    ('crew_callout', 'EMAIL'): (
+        "Subject: URGENT open trip {flight_number}\n\n"
+        "{crew_name},\n\nOpen trip available: {flight_number} {origin}-{destination} departing "
+        "{departure_time} UTC. Reply YES to accept or call Crew Scheduling."
+    ),
+}
+
+
+def _connect():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        connection_name=os.getenv("SNOWFLAKE_CONNECTION_NAME") or "USWEST_DEMOACCOUNT")
+
+
+class CompiledTemplate:
+    """str.format-style template parsed once into literal / field parts"""
+
+    def __init__(self, source):
+        self.parts = []
+        self.fields = set()
+        for literal, field, _, _ in string.Formatter().parse(source):
+            if literal:
+                self.parts.append((True, literal))
+            if field is not None:
+                self.parts.append((False, field))
+                self.fields.add(field)
+
+    def render(self, values):
+        return ''.join(part if is_literal else str(values.get(part) or '')
+                       for is_literal, part in self.parts)
+
+
+COMPILED = {key: CompiledTemplate(source) for key, source in TEMPLATES.items()}
+
+
+class Message:
+    __slots__ = ('recipient_id', 'flight_id', 'kind', 'channel', 'address', 'tier', 'values',
+                 'body', 'personalised', 'attempts', 'enqueued_at')
+
+    def __init__(self, recipient_id, flight_id, kind, channel, address, values, tier=None):
+        self.recipient_id = recipient_id
+        self.flight_id = flight_id
+        self.kind = kind
+        self.channel = channel
+        self.address = address
+        self.tier = tier
+        self.values = values
+        self.body = None
+        self.personalised = False
+        self.attempts = 0
+        self.enqueued_at = None
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def _hhmm(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime('%H:%M') if value else ''
+
+
+def passenger_message(row):
+    """Message for one REBOOKING_OPTIONS row joined to passenger contact details"""
+    row = {k.lower(): v for k, v in row.items()}
+    preference = (row.get('communication_preference') or 'EMAIL').upper()
+    if preference == 'NONE':
+        return None
+    # PUSH goes through the SMS gateway until an app channel is plugged in
+    channel = 'EMAIL' if preference == 'EMAIL' else 'SMS'
+    address = row.get('email') if channel == 'EMAIL' else row.get('phone')
+    if not address:
+        channel, address = ('SMS', row.get('phone')) if channel == 'EMAIL' else ('EMAIL', row.get('email'))
+    if not address:
+        return None
+    status = (row.get('original_status') or '').upper()
+    values = dict(row)
+    if status == 'CANCELLED':
+        values['status_text'] = 'cancelled'
+    elif row.get('departure_delay_minutes'):
+        values['status_text'] = f"delayed {row['departure_delay_minutes']} minutes"
+    else:
+        values['status_text'] = 'delayed'
+    values['reason_text'] = f" due to {row['delay_reason'].lower()}" if row.get('delay_reason') else ''
+    values['rebook_time'] = _hhmm(row.get('rebook_departure'))
+    kind = 'rebooked' if row.get('rebook_flight_number') else 'no_option'
+    return Message(row['passenger_id'], row['original_flight_id'], kind, channel, address, values,
+                   tier=(row.get('loyalty_tier') or '').upper())
+
+
+def crew_message(row):
+    row = {k.lower(): v for k, v in row.items()}
+    address = row.get('phone_number')
+    channel = 'SMS'
+    if not address:
+        channel, address = 'EMAIL', row.get('email')
+    if not address:
+        return None
+    values = dict(row)
+    values['departure_time'] = _hhmm(row.get('scheduled_departure_utc'))
+    return Message(row['crew_id'], row['flight_id'], 'crew_callout', channel, address, values)
+
+
+def load_from_snowflake(database, flight_id=None, crew_role=None, max_candidates=20):
+    from snowflake.connector import DictCursor
+    conn = _connect()
+    cur = conn.cursor(DictCursor)
+    try:
+        # Impacted bookings come from BOOKINGS/FLIGHTS: REBOOKING_OPTIONS only
+        # has passengers with an alternative, and those without one get no_option
+        cur.execute(f"""
+            SELECT b.booking_id, b.confirmation_code, b.passenger_id,
+                   p.first_name, p.last_name, p.email, p.phone, p.loyalty_tier,
+                   p.communication_preference,
+                   f.flight_id AS original_flight_id, f.flight_number AS original_flight_number,
+                   f.origin, f.destination, f.scheduled_departure_utc AS original_departure,
+                   f.status AS original_status, f.departure_delay_minutes, f.delay_reason,
+                   r.rebook_flight_id, r.rebook_flight_number, r.rebook_departure, r.rebook_arrival
+            FROM {database}.RAW.BOOKINGS b
+            JOIN {database}.RAW.FLIGHTS f ON b.flight_id = f.flight_id
+            JOIN {database}.RAW.PASSENGERS p ON b.passenger_id = p.passenger_id
+            LEFT JOIN {database}.ANALYTICS.REBOOKING_OPTIONS r
+              ON r.booking_id = b.booking_id AND r.option_rank = 1
+            WHERE f.status IN ('CANCELLED', 'DELAYED')
+              AND f.flight_date = CURRENT_DATE()
+              AND b.booking_status IN ('CONFIRMED', 'COMPLETED')
+              {'AND f.flight_id = %(flight)s' if flight_id else ''}
+        """, {'flight': flight_id})
+        passengers = cur.fetchall()
+        crew = []
+        if flight_id and crew_role:
+            cur.execute(f"""
+                SELECT crew_id, crew_name, phone_number, email, flight_id, flight_number,
+                       origin, destination, scheduled_departure_utc
+                FROM {database}.ML_MODELS.CREW_CANDIDATE_RANKINGS
+                WHERE flight_id = %(flight)s AND crew_type = %(role)s AND is_type_qualified
+                QUALIFY ROW_NUMBER() OVER (ORDER BY ml_fit_score DESC) <= %(limit)s
+            """, {'flight': flight_id, 'role': crew_role, 'limit': max_candidates})
+            crew = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    return passengers, crew
+
+
+def load_from_file(path):
+    """JSON lines; rows with CREW_ID are crew call-outs, the rest rebooking results"""
+    passengers, crew = [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                (crew if any(k.lower() == 'crew_id' for k in row) else passengers).append(row)
+    return passengers, crew
+
+
+def demo_rows(count, seed=11):
+    """A widebody-bank cancellation: `count` bookings, ~3% duplicated rows, 60 crew"""
+    rng = random.Random(seed)
+    tiers = ['DIAMOND'] * 3 + ['PLATINUM'] * 5 + ['GOLD'] * 12 + ['SILVER'] * 20 + ['MEMBER'] * 60
+    departure = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(hours=2)
+    passengers = []
+    for i in range(count):
+        flight = i % max(count // 200, 1)
+        passengers.append({
+            'PASSENGER_ID': f"PAX{i:07d}", 'BOOKING_ID': f"BK{i:08d}", 'CONFIRMATION_CODE': f"{i:06X}",
+            'FIRST_NAME': f"Pax{i}", 'LAST_NAME': 'Traveler', 'LOYALTY_TIER': rng.choice(tiers),
+            'EMAIL': f"pax{i}@example.com", 'PHONE': f"+1555{i:07d}",
+            'COMMUNICATION_PREFERENCE': rng.choice(['EMAIL', 'SMS', 'PUSH']),
+            'ORIGINAL_FLIGHT_ID': f"PH{flight:04d}", 'ORIGINAL_FLIGHT_NUMBER': f"PH{flight:04d}",
+            'ORIGIN': 'ATL', 'DESTINATION': 'LAX', 'ORIGINAL_STATUS': 'CANCELLED',
+            'DELAY_REASON': 'Crew scheduling system outage',
+            'REBOOK_FLIGHT_NUMBER': f"PH{flight + 5000:04d}" if rng.random() > 0.15 else None,
+            'REBOOK_DEPARTURE': (departure + timedelta(hours=rng.randint(1, 8))).isoformat(),
+        })
+    passengers.extend(rng.sample(passengers, count // 33))
+    crew = [{
+        'CREW_ID': f"CR{i:05d}", 'CREW_NAME': f"Crew {i}", 'PHONE_NUMBER': f"+1444{i:07d}",
+        'EMAIL': f"crew{i}@example.com", 'FLIGHT_ID': 'PH0000', 'FLIGHT_NUMBER': 'PH0000',
+        'ORIGIN': 'ATL', 'DESTINATION': 'LAX', 'SCHEDULED_DEPARTURE_UTC': departure.isoformat(),
+    } for i in range(60)]
+    return passengers, crew
+
+
+# ---------------------------------------------------------------------------
+# Personalisation
+# ---------------------------------------------------------------------------
+
+class CortexPersonaliser:
+    """Rewrites premium-tier messages with one CORTEX.COMPLETE statement per batch"""
+
+    def __init__(self, database, batch_size=200):
+        self.database = database
+        self.batch_size = batch_size
+        self.conn = _connect()
+
+    def _complete(self, messages):
+        prompts = [
+            f"Rewrite this airline notification for a {m.tier} loyalty member named "
+            f"{m.values.get('first_name')}. Keep every fact, flight number and code unchanged, "
+            f"stay under {'300' if m.channel == 'SMS' else '900'} characters, warm and professional:"
+            f"\n\n{m.body}"
+            for m in messages
+        ]
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                "SELECT idx, SNOWFLAKE.CORTEX.COMPLETE(%s, prompt) FROM ("
+                + ' UNION ALL '.join(['SELECT %s AS idx, %s AS prompt'] * len(prompts))
+                + ") ORDER BY idx",
+                [LLM_MODEL] + [v for i, p in enumerate(prompts) for v in (i, p)])
+            return [text for _, text in cur.fetchall()]
+        finally:
+            cur.close()
+
+    async def personalise(self, messages):
+        for start in range(0, len(messages), self.batch_size):
+            batch = messages[start:start + self.batch_size]
+            try:
+                texts = await asyncio.to_thread(self._complete, batch)
+            except Exception as exc:
+                # Template text is already rendered; premium passengers still get notified
+                print(f"Personalisation failed for {len(batch)} messages: {exc}")
+                continue
+            for message, text in zip(batch, texts):
+                if text:
+                    message.body = text.strip()
+                    message.personalised = True
+
+
+class StubPersonaliser:
+    """Simulated LLM latency per batch for local runs"""
+
+    def __init__(self, batch_size=200, latency_s=0.8):
+        self.batch_size = batch_size
+        self.latency_s = latency_s
+
+    async def personalise(self, messages):
+        batches = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+
+        async def run(batch):
+            await asyncio.sleep(self.latency_s)
+            for message in batch:
+                message.body = f"{message.values.get('first_name')}, as a valued {message.tier.title()} " \
+                               f"member: {message.body}"
+                message.personalised = True
+
+        await asyncio.gather(*(run(b) for b in batches))
+
+
+# ---------------------------------------------------------------------------
+# Channels
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Async token bucket; acquire(n) waits until n tokens are available"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, n=1):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+class SendResult:
+    OK, RETRY, FAILED = 'ok', 'retry', 'failed'
+
+
+class Channel:
+    """Base for delivery providers; send_batch returns one SendResult per message"""
+
+    name = 'BASE'
+    max_batch = 100
+    rate = 1000
+
+    async def send_batch(self, messages):
+        raise NotImplementedError
+
+
+class StubChannel(Channel):
+    """Local provider: fixed per-batch latency plus per-message transient failures"""
+
+    def __init__(self, name, rate, max_batch=500, latency_s=0.02, failure_rate=0.01, seed=None):
+        self.name = name
+        self.rate = rate
+        self.max_batch = max_batch
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.delivered = []
+
+    async def send_batch(self, messages):
+        await asyncio.sleep(self.latency_s)
+        results = []
+        for message in messages:
+            if self.random.random() < self.failure_rate:
+                results.append(SendResult.RETRY)
+            else:
+                results.append(SendResult.OK)
+                self.delivered.append(message.address)
+        return results
+
+
+class LatencyHistogram:
+    """Log-spaced buckets (10 per decade) from 100us to 10min"""
+
+    BUCKETS_PER_DECADE = 10
+    MIN_S = 1e-4
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        bucket = max(0, math.ceil(math.log10(max(seconds, self.MIN_S) / self.MIN_S) * self.BUCKETS_PER_DECADE))
+        self.counts[bucket] += 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th value"""
+        if not self.total:
+            return 0.0
+        target = pct / 100 * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self.MIN_S * 10 ** (bucket / self.BUCKETS_PER_DECADE), self.max)
+        return self.max
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class Dispatcher:
+
+    def __init__(self, channels, personaliser=None, workers_per_channel=4, max_attempts=4,
+                 linger_s=0.005, backoff_s=0.2):
+        self.channels = {c.name: c for c in channels}
+        self.personaliser = personaliser
+        self.workers_per_channel = workers_per_channel
+        self.max_attempts = max_attempts
+        self.linger_s = linger_s
+        self.backoff_s = backoff_s
+        self.queues = {}
+        self.buckets = {c.name: TokenBucket(c.rate, max(c.rate, c.max_batch)) for c in channels}
+        self.histograms = {c.name: LatencyHistogram() for c in channels}
+        self.seen = set()
+        self.counts = defaultdict(int)
+        self.pending_retries = set()
+        self.dead_letter = []
+
+    def prepare(self, messages):
+        """Deduplicate and render; returns messages that still need sending"""
+        unique = []
+        for message in messages:
+            if message is None:
+                self.counts['suppressed'] += 1
+                continue
+            key = (message.recipient_id, message.flight_id, message.kind)
+            if key in self.seen:
+                self.counts['duplicates'] += 1
+                continue
+            self.seen.add(key)
+            message.body = COMPILED[(message.kind, message.channel)].render(message.values)
+            unique.append(message)
+        self.counts['rendered'] += len(unique)
+        return unique
+
+    async def _worker(self, name):
+        channel, queue = self.channels[name], self.queues[name]
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.linger_s
+            while len(batch) < channel.max_batch:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            await self.buckets[name].acquire(len(batch))
+            try:
+                results = list(await channel.send_batch(batch))
+            except Exception:
+                results = [SendResult.RETRY] * len(batch)
+            if len(results) != len(batch):
+                # A short result list must not strand messages: every
+                # queue item needs its task_done() or run() never finishes
+                self.counts['short_results'] += len(batch) - min(len(results), len(batch))
+                results = results[:len(batch)]
+                results += [SendResult.RETRY] * (len(batch) - len(results))
+            now = time.monotonic()
+            for message, result in zip(batch, results):
+                message.attempts += 1
+                if result == SendResult.OK:
+                    self.histograms[name].record(now - message.enqueued_at)
+                    self.counts[f"sent_{name}"] += 1
+                elif result == SendResult.RETRY and message.attempts < self.max_attempts:
+                    self.counts['retries'] += 1
+                    self._schedule_retry(message)
+                else:
+                    self.dead_letter.append(message)
+                queue.task_done()
+
+    def _schedule_retry(self, message):
+        delay = self.backoff_s * 2 ** (message.attempts - 1) * random.uniform(0.8, 1.2)
+        task = asyncio.ensure_future(self._requeue(message, delay))
+        self.pending_retries.add(task)
+        task.add_done_callback(self.pending_retries.discard)
+
+    async def _requeue(self, message, delay):
+        await asyncio.sleep(delay)
+        self.queues[message.channel].put_nowait(message)
+
+    async def run(self, messages):
+        started = time.monotonic()
+        messages = self.prepare(messages)
+        self.queues = {name: asyncio.Queue() for name in self.channels}
+        workers = [asyncio.ensure_future(self._worker(name))
+                   for name in self.channels for _ in range(self.workers_per_channel)]
+
+        # Standard messages go out immediately; premium ones follow once personalised
+        premium = [m for m in messages if m.tier in PREMIUM_TIERS] if self.personaliser else []
+        premium_ids = {id(m) for m in premium}
+        for message in messages:
+            if id(message) not in premium_ids:
+                message.enqueued_at = time.monotonic()
+                self.queues[message.channel].put_nowait(message)
+        if premium:
+            await self.personaliser.personalise(premium)
+            self.counts['personalised'] = sum(1 for m in premium if m.personalised)
+            for message in premium:
+                message.enqueued_at = time.monotonic()
+                self.queues[message.channel].put_nowait(message)
+
+        while True:
+            await asyncio.gather(*(q.join() for q in self.queues.values()))
+            if not self.pending_retries:
+                break
+            await asyncio.gather(*list(self.pending_retries))
+        for worker in workers:
+            worker.cancel()
+        self.counts['dead_lettered'] = len(self.dead_letter)
+        return time.monotonic() - started
+
+    def report(self, elapsed):
+        sent = sum(v for k, v in self.counts.items() if k.startswith('sent_'))
+        print(f"\nRendered {self.counts['rendered']:,} | duplicates dropped {self.counts['duplicates']:,} | "
+              f"suppressed {self.counts['suppressed']:,} | personalised {self.counts['personalised']:,}")
+        print(f"Sent {sent:,} in {elapsed:.2f}s ({sent / elapsed:,.0f} msg/s) | "
+              f"retries {self.counts['retries']:,} | dead-lettered {self.counts['dead_lettered']:,}")
+        print(f"\n{'CHANNEL':<8} {'SENT':>9} {'P50 ms':>9} {'P90 ms':>9} {'P99 ms':>9} {'MAX ms':>9}")
+        for name, histogram in self.histograms.items():
+            print(f"{name:<8} {self.counts[f'sent_{name}']:>9,} " + ' '.join(
+                f"{histogram.percentile(p) * 1000:>9.1f}" for p in (50, 90, 99)) +
+                f" {histogram.max * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--demo', type=int, metavar='N', help='Synthetic cancellation with N bookings')
+    source.add_argument('--input', help='JSON lines of rebooking / crew call-out rows')
+    parser.add_argument('--database', default=os.getenv('SNOWFLAKE_DATABASE', 'PHANTOM_IROPS'))
+    parser.add_argument('--flight', help='Limit to one disrupted flight (required for crew call-outs)')
+    parser.add_argument('--crew-role', help='Crew type to call out, e.g. CAPTAIN')
+    parser.add_argument('--sms-rate', type=float, default=20000, help='SMS messages per second')
+    parser.add_argument('--email-rate', type=float, default=20000, help='Emails per second')
+    parser.add_argument('--batch', type=int, default=500, help='Messages per provider call')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent sends per channel')
+    parser.add_argument('--failure-rate', type=float, default=0.01, help='Stub channel transient failure rate')
+    parser.add_argument('--no-llm', action='store_true', help='Skip premium-tier personalisation')
+    args = parser.parse_args()
+
+    if args.demo:
+        passengers, crew = demo_rows(args.demo)
+    elif args.input:
+        passengers, crew = load_from_file(args.input)
+    else:
+        passengers, crew = load_from_snowflake(args.database, args.flight, args.crew_role)
+
+    live = not (args.demo or args.input)
+    personaliser = None
+    if not args.no_llm:
+        personaliser = CortexPersonaliser(args.database) if live else StubPersonaliser()
+    channels = [
+        StubChannel('SMS', args.sms_rate, args.batch, failure_rate=args.failure_rate, seed=1),
+        StubChannel('EMAIL', args.email_rate, args.batch, failure_rate=args.failure_rate, seed=2),
+    ]
+    dispatcher = Dispatcher(channels, personaliser, workers_per_channel=args.workers)
+    messages = [passenger_message(r) for r in passengers] + [crew_message(r) for r in crew]
+    print(f"Dispatching {len(messages):,} candidate notifications "
+          f"({len(passengers):,} passenger rows, {len(crew):,} crew call-outs)...")
+    elapsed = asyncio.run(dispatcher.run(messages))
+    dispatcher.report(elapsed)
+
+
+if __name__ == '__main__':
+    main()
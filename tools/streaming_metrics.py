@@ -0,0 +1,811 @@
+#!/usr/bin/env python3
+"""
+Incremental ingest-rate and lag accounting for the streaming comparison APIs
+
+The streaming-compare, streaming-stats and streaming-cost routes run
+COUNT(*) / MIN / MAX over the whole FLIGHT_EVENTS_STREAMING and
+FLIGHT_EVENTS_HIGH_PERF tables on every refresh. This accumulator consumes
+only newly ingested events (tailing the Kafka-fed classic table by
+partition/offset and the SDK-fed high-performance table by an ingest-time
+column with EVENT_ID dedupe, or from a local JSON lines feed), keeps running totals, per-minute rollups,
+per-partition offset lag and log-linear latency histograms of
+ingested_at - event_timestamp, and answers the same questions in constant
+time.
+
+Usage:
+    python3 tools/streaming_metrics.py serve                   # Tail Snowflake, serve JSON
+    python3 tools/streaming_metrics.py serve --demo            # Synthetic classic vs high-perf feeds
+    python3 tools/streaming_metrics.py ingest --input events.jsonl --architecture classic
+    python3 tools/streaming_metrics.py report
+
+Endpoints (same response shapes as the Next.js routes):
+    GET /streaming-compare   GET /streaming-stats   GET /streaming-cost   GET /lag
+    POST /end-offsets   {"classic": {"0": 18234, "1": 17990}}
+
+Per-partition lag needs the broker's log-end offsets, which Snowflake does
+not have. Feed them with POST /end-offsets or `ingest --end-offsets FILE`
+(e.g. from kafka-get-offsets.sh on a cron); /lag reports partitions without
+a recent end offset as unmeasured (null) rather than 0.
+
+Closed minutes are appended to <state-dir>/<architecture>/<YYYYMMDD>.jsonl
+and running totals to <state-dir>/state.json, so a restart resumes from the
+last offsets instead of rescanning the tables.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARCHITECTURES = {
+    'classic': {
+        'name': 'Classic',
+        'table': 'RAW.FLIGHT_EVENTS_STREAMING',
+        'cursor': 'kafka',
+        'billing_model': 'Per-row (credits)',
+        'architecture': 'Kafka → Connector → Snowflake',
+    },
+    'high_perf': {
+        'name': 'High-Performance',
+        'table': 'RAW.FLIGHT_EVENTS_HIGH_PERF',
+        # Snowpipe Streaming SDK, no Kafka: no RECORD_METADATA partition/offset
+        'cursor': 'ingest_time',
+        'billing_model': 'Per-GB (throughput)',
+        'architecture': 'SDK → PIPE → Snowflake',
+    },
+}
+
+# Pricing constants from react-app/app/api/streaming-compare/route.ts
+AVG_ROW_SIZE_BYTES = 250
+CREDIT_PRICE_USD = 2.35
+CLASSIC_CREDITS_PER_THOUSAND_ROWS = 0.000024
+HIGH_PERF_CREDITS_PER_GB = 0.0037
+
+# streaming-cost/route.ts prices credits differently and compares against a
+# 4 credit/h warehouse
+COST_ROUTE_CREDIT_PRICE_USD = 3.00
+COST_ROUTE_WAREHOUSE_USD_PER_HOUR = 4
+
+WINDOWS_MIN = (1, 5, 15, 60)
+END_OFFSETS_MAX_AGE_S = 300
+RETAINED_MINUTES = 60
+ALLOWED_LATENESS_MIN = 2
+
+
+def _connect():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        connection_name=os.getenv("SNOWFLAKE_CONNECTION_NAME") or "USWEST_DEMOACCOUNT")
+
+
+def _epoch(value):
+    """Seconds since epoch; naive timestamps are UTC (TIMESTAMP_NTZ)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _round(value, digits=0):
+    """JavaScript Math.round(value * 10**digits) / 10**digits, as the routes do"""
+    scale = 10 ** digits
+    rounded = math.floor(value * scale + 0.5)
+    return rounded / scale if digits else int(rounded)
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat() if epoch else None
+
+
+# ---------------------------------------------------------------------------
+# Histogram
+# ---------------------------------------------------------------------------
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of non-negative integer milliseconds
+
+    Values below 2 * SUB_BUCKETS are exact; above that each power of two is
+    split into SUB_BUCKETS linear buckets, bounding relative error to
+    1 / SUB_BUCKETS. Counts are sparse, so idle minutes persist as a few bytes
+    and histograms merge by adding counts.
+    """
+
+    SUB_BUCKETS = 64
+
+    def __init__(self, counts=None):
+        self.counts = defaultdict(int)
+        for index, count in (counts or {}).items():
+            self.counts[int(index)] += count
+        self.total = sum(self.counts.values())
+
+    @classmethod
+    def index(cls, value):
+        value = max(0, int(value))
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKETS.bit_length()
+        return 2 * cls.SUB_BUCKETS + (shift - 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def value(cls, index):
+        """Midpoint of a bucket"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - 2 * cls.SUB_BUCKETS, cls.SUB_BUCKETS)
+        shift += 1
+        return ((sub + cls.SUB_BUCKETS) << shift) + (1 << shift) // 2
+
+    def record(self, value_ms, count=1):
+        self.counts[self.index(value_ms)] += count
+        self.total += count
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] += count
+        self.total += other.total
+        return self
+
+    def percentile(self, pct):
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return self.value(index)
+        return self.value(max(self.counts))
+
+    def mean(self):
+        if not self.total:
+            return 0.0
+        return sum(self.value(i) * c for i, c in self.counts.items()) / self.total
+
+    def to_json(self):
+        return {str(i): c for i, c in self.counts.items() if c}
+
+
+# ---------------------------------------------------------------------------
+# Accumulator
+# ---------------------------------------------------------------------------
+
+class MinuteRollup:
+
+    def __init__(self, minute, rows=0, bytes=0, first_event=None, last_event=None, latency=None):
+        self.minute = minute
+        self.rows = rows
+        self.bytes = bytes
+        self.first_event = first_event
+        self.last_event = last_event
+        self.latency = LatencyHistogram(latency)
+        # Changed since last written; a minute can be written more than once
+        self.dirty = True
+
+    def to_json(self):
+        return {'minute': _iso(self.minute * 60), 'rows': self.rows, 'bytes': self.bytes,
+                'first_event': _iso(self.first_event), 'last_event': _iso(self.last_event),
+                'latency_ms': self.latency.to_json()}
+
+    @classmethod
+    def from_json(cls, record):
+        return cls(int(_epoch(record['minute']) // 60), record['rows'], record['bytes'],
+                   _epoch(record['first_event']), _epoch(record['last_event']), record['latency_ms'])
+
+
+class ArchitectureMetrics:
+    """Running totals, rollups and offsets for one ingestion architecture"""
+
+    def __init__(self, key, state_dir=None):
+        self.key = key
+        self.state_dir = state_dir
+        self.rows = 0
+        self.bytes = 0
+        self.first_event = None
+        self.last_event = None
+        self.last_ingested = None
+        self.rollups = {}
+        self.offsets = {}
+        self.end_offsets = {}
+        self.end_offsets_at = None
+        self.cursor = None
+        self.seen_ids = {}
+        self.latency = LatencyHistogram()
+
+    def ingest(self, event):
+        """Account one event; returns False for a row already counted
+
+        Events carry event_timestamp, ingested_at and bytes, plus either
+        kafka_partition/kafka_offset or event_id (and optionally cursor_at, the
+        tail's cursor column). Rows at or behind the recorded offset, or with
+        an event_id already seen, are skipped.
+        """
+        partition, offset = event.get('kafka_partition'), event.get('kafka_offset')
+        event_id = event.get('event_id')
+        if partition is not None and offset is not None:
+            partition, offset = int(partition), int(offset)
+            if offset <= self.offsets.get(partition, -1):
+                return False
+            self.offsets[partition] = offset
+        elif event_id is not None:
+            if event_id in self.seen_ids:
+                return False
+            cursor_ts = _epoch(event.get('cursor_at') or event.get('ingested_at')) or time.time()
+            self.seen_ids[event_id] = cursor_ts
+            self.cursor = max(self.cursor or cursor_ts, cursor_ts)
+
+        event_ts = _epoch(event.get('event_timestamp'))
+        ingested_ts = _epoch(event.get('ingested_at')) or time.time()
+        size = event.get('bytes') or AVG_ROW_SIZE_BYTES
+        self.rows += 1
+        self.bytes += size
+        if event_ts is not None:
+            self.first_event = event_ts if self.first_event is None else min(self.first_event, event_ts)
+            self.last_event = event_ts if self.last_event is None else max(self.last_event, event_ts)
+        self.last_ingested = max(self.last_ingested or 0, ingested_ts)
+
+        minute = int(ingested_ts // 60)
+        if minute < int(time.time() // 60) - RETAINED_MINUTES:
+            # Its persisted rollup is no longer in memory; a fresh partial one
+            # would supersede it on restore, so only the totals count it
+            return True
+        rollup = self.rollups.get(minute)
+        if rollup is None:
+            rollup = self.rollups[minute] = MinuteRollup(minute)
+        rollup.dirty = True
+        rollup.rows += 1
+        rollup.bytes += size
+        if event_ts is not None:
+            rollup.first_event = event_ts if rollup.first_event is None else min(rollup.first_event, event_ts)
+            rollup.last_event = event_ts if rollup.last_event is None else max(rollup.last_event, event_ts)
+            latency_ms = max(0.0, (ingested_ts - event_ts) * 1000)
+            rollup.latency.record(latency_ms)
+            self.latency.record(latency_ms)
+        return True
+
+    def prune_seen(self, horizon_s):
+        """Forget event IDs older than the tail's re-read window"""
+        if self.cursor is None:
+            return
+        cutoff = self.cursor - horizon_s
+        self.seen_ids = {k: t for k, t in self.seen_ids.items() if t >= cutoff}
+
+    def observe_end_offsets(self, end_offsets, at=None):
+        """Kafka log-end offset (next offset to be written) per partition"""
+        for partition, offset in end_offsets.items():
+            self.end_offsets[int(partition)] = int(offset)
+        self.end_offsets_at = at or time.time()
+
+    def lag(self, max_age_s=None):
+        """Messages produced but not yet landed per partition; None if not measured"""
+        stale = self.end_offsets_at is None or \
+            (max_age_s is not None and time.time() - self.end_offsets_at > max_age_s)
+        partitions = set(self.offsets) | set(self.end_offsets)
+        return {p: None if stale or p not in self.end_offsets
+                else max(0, self.end_offsets[p] - self.offsets.get(p, -1) - 1)
+                for p in sorted(partitions)}
+
+    def window(self, minutes, now=None):
+        """Rows, bytes and merged latency for the trailing window"""
+        current = int((now or time.time()) // 60)
+        rows = size = 0
+        latency = LatencyHistogram()
+        for minute in range(current - minutes + 1, current + 1):
+            rollup = self.rollups.get(minute)
+            if rollup:
+                rows += rollup.rows
+                size += rollup.bytes
+                latency.merge(rollup.latency)
+        return {'rows': rows, 'bytes': size, 'rows_per_second': rows / (minutes * 60), 'latency': latency}
+
+    def flush(self, now=None, force=False):
+        """Persist changed closed minutes and drop those older than the retention window
+
+        Each write appends the minute's full rollup; restore() keeps the last
+        record per minute, so a minute that changes after being written (late
+        rows, or more events after a forced shutdown flush) is simply rewritten.
+        Minutes still open stay dirty and are checkpointed in state.json.
+        """
+        current = int((now or time.time()) // 60)
+        closed = sorted(m for m in self.rollups if force or m < current - ALLOWED_LATENESS_MIN)
+        if self.state_dir and closed:
+            directory = os.path.join(self.state_dir, self.key)
+            os.makedirs(directory, exist_ok=True)
+            by_day = defaultdict(list)
+            for minute in closed:
+                by_day[datetime.fromtimestamp(minute * 60, timezone.utc).strftime('%Y%m%d')].append(minute)
+            for day, minutes in by_day.items():
+                with open(os.path.join(directory, f"{day}.jsonl"), 'a') as f:
+                    for minute in minutes:
+                        if self.rollups[minute].dirty:
+                            f.write(json.dumps(self.rollups[minute].to_json()) + '\n')
+                            self.rollups[minute].dirty = False
+        for minute in closed:
+            if minute < current - RETAINED_MINUTES:
+                del self.rollups[minute]
+
+    def state(self):
+        return {'rows': self.rows, 'bytes': self.bytes, 'first_event': self.first_event,
+                'last_event': self.last_event, 'last_ingested': self.last_ingested,
+                'offsets': {str(p): o for p, o in self.offsets.items()},
+                'end_offsets': {str(p): o for p, o in self.end_offsets.items()},
+                'end_offsets_at': self.end_offsets_at,
+                'cursor': self.cursor, 'seen_ids': self.seen_ids,
+                'latency_ms': self.latency.to_json(),
+                # Written atomically with the offsets, so a crash between
+                # checkpoints can lose neither the open minutes nor the rows
+                # the advanced offsets have already skipped past
+                'open_rollups': [r.to_json() for _, r in sorted(self.rollups.items()) if r.dirty]}
+
+    def restore(self, state):
+        self.rows = state['rows']
+        self.bytes = state['bytes']
+        self.first_event = state['first_event']
+        self.last_event = state['last_event']
+        self.last_ingested = state.get('last_ingested')
+        self.offsets = {int(p): o for p, o in state['offsets'].items()}
+        self.end_offsets = {int(p): o for p, o in state.get('end_offsets', {}).items()}
+        self.end_offsets_at = state.get('end_offsets_at')
+        self.cursor = state.get('cursor')
+        self.seen_ids = state.get('seen_ids', {})
+        self.latency = LatencyHistogram(state.get('latency_ms'))
+        # Reload the retained minutes so windows are warm after a restart
+        cutoff = int(time.time() // 60) - RETAINED_MINUTES
+        directory = os.path.join(self.state_dir or '', self.key)
+        for day in sorted(os.listdir(directory))[-2:] if os.path.isdir(directory) else []:
+            with open(os.path.join(directory, day)) as f:
+                for line in f:
+                    rollup = MinuteRollup.from_json(json.loads(line))
+                    if rollup.minute >= cutoff:
+                        rollup.dirty = False
+                        # Later records for a minute supersede earlier ones
+                        self.rollups[rollup.minute] = rollup
+        # Minutes open at the checkpoint are newer than anything in the files
+        # and stay dirty so they are written once they close
+        for record in state.get('open_rollups', []):
+            rollup = MinuteRollup.from_json(record)
+            if rollup.minute >= cutoff:
+                self.rollups[rollup.minute] = rollup
+
+
+class StreamingMetrics:
+    """Both architectures plus persistence and the route-shaped views"""
+
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir
+        self.lock = threading.Lock()
+        self.architectures = {k: ArchitectureMetrics(k, state_dir) for k in ARCHITECTURES}
+        state_path = self._state_path()
+        if state_path and os.path.exists(state_path):
+            with open(state_path) as f:
+                saved = json.load(f)
+            for key, state in saved.items():
+                if key in self.architectures:
+                    self.architectures[key].restore(state)
+
+    def _state_path(self):
+        return os.path.join(self.state_dir, 'state.json') if self.state_dir else None
+
+    def ingest(self, architecture, events):
+        """Account a batch; returns how many events were new"""
+        with self.lock:
+            metrics = self.architectures[architecture]
+            return sum(1 for event in events if metrics.ingest(event))
+
+    def prune_seen(self, architecture, horizon_s):
+        with self.lock:
+            self.architectures[architecture].prune_seen(horizon_s)
+
+    def checkpoint(self, force=False):
+        with self.lock:
+            for metrics in self.architectures.values():
+                metrics.flush(force=force)
+            if self.state_dir:
+                os.makedirs(self.state_dir, exist_ok=True)
+                tmp = self._state_path() + '.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump({k: m.state() for k, m in self.architectures.items()}, f)
+                os.replace(tmp, self._state_path())
+
+    # Views -----------------------------------------------------------------
+
+    def _architecture_stats(self, key):
+        metrics = self.architectures[key]
+        spec = ARCHITECTURES[key]
+        duration = (metrics.last_event - metrics.first_event) if metrics.rows and metrics.first_event else 0
+        safe_duration = max(duration, 1)
+        data_gb = metrics.rows * AVG_ROW_SIZE_BYTES / 1024 ** 3
+        if key == 'classic':
+            credits = metrics.rows / 1000 * CLASSIC_CREDITS_PER_THOUSAND_ROWS
+        else:
+            credits = data_gb * HIGH_PERF_CREDITS_PER_GB
+        cost = credits * CREDIT_PRICE_USD
+        return {
+            'name': spec['name'],
+            'totalRows': metrics.rows,
+            'dataGb': _round(data_gb, 3),
+            'durationMinutes': _round(duration / 60, 1),
+            'rowsPerSecond': _round(metrics.rows / safe_duration),
+            'gbPerHour': _round(data_gb / safe_duration * 3600, 2),
+            'estimatedCostUsd': _round(cost, 4),
+            'estimatedCredits': _round(credits, 4),
+            'costPerMillionRows': _round(cost / metrics.rows * 1e6, 4) if metrics.rows else 0,
+            'costPerGb': _round(cost / data_gb, 4) if data_gb else 0,
+            'billingModel': spec['billing_model'],
+            'architecture': spec['architecture'],
+            'isActive': metrics.rows > 0,
+        }
+
+    def compare(self):
+        with self.lock:
+            classic = self._architecture_stats('classic')
+            high_perf = self._architecture_stats('high_perf')
+        comparison = None
+        if classic['totalRows'] and high_perf['totalRows']:
+            a, b = classic['costPerMillionRows'], high_perf['costPerMillionRows']
+            winner = 'classic' if a < b else 'high_perf'
+            comparison = {
+                'winner': winner,
+                'winnerName': 'Classic' if winner == 'classic' else 'High-Performance',
+                'savingsPercent': _round(abs(a - b) / max(a, b) * 100) if max(a, b) else 0,
+                'classicCostPer1M': a,
+                'highPerfCostPer1M': b,
+            }
+        return {'classic': classic, 'highPerf': high_perf, 'costComparison': comparison}
+
+    def stats(self, architecture='classic'):
+        with self.lock:
+            metrics = self.architectures[architecture]
+            windows = {m: metrics.window(m) for m in WINDOWS_MIN}
+            last5 = windows[5]
+            return {
+                'totalEvents': metrics.rows,
+                'eventsLast5Min': last5['rows'],
+                'avgLatencyMs': round(last5['latency'].mean()),
+                'p50LatencyMs': last5['latency'].percentile(50),
+                'p99LatencyMs': last5['latency'].percentile(99),
+                'streamHasData': last5['rows'] > 0,
+                'latestEvent': _iso(metrics.last_event),
+                'windows': {f"{m}m": {'rows': w['rows'], 'bytes': w['bytes'],
+                                      'rowsPerSecond': round(w['rows_per_second'], 1),
+                                      'p99LatencyMs': w['latency'].percentile(99)}
+                            for m, w in windows.items()},
+            }
+
+    def cost(self, architecture='classic'):
+        """streaming-cost/route.ts shape, constants and rounding"""
+        with self.lock:
+            metrics = self.architectures[architecture]
+            rows, first, last = metrics.rows, metrics.first_event, metrics.last_event
+        # TIMESTAMPDIFF(SECOND, MIN, MAX) counts whole-second boundaries
+        duration = max(int(last) - int(first) if rows and first else 0, 1)
+        data_gb = rows * AVG_ROW_SIZE_BYTES / 1024 ** 3
+        if architecture == 'classic':
+            credits = rows / 1000 * CLASSIC_CREDITS_PER_THOUSAND_ROWS
+        else:
+            credits = data_gb * HIGH_PERF_CREDITS_PER_GB
+        cost = credits * COST_ROUTE_CREDIT_PRICE_USD
+        warehouse_cost = duration / 3600 * COST_ROUTE_WAREHOUSE_USD_PER_HOUR
+        return {
+            'totalRows': rows,
+            'dataGb': _round(data_gb, 3),
+            'durationSeconds': duration,
+            'durationMinutes': _round(duration / 60, 1),
+            'rowsPerSecond': _round(rows / duration),
+            'gbPerHour': _round(data_gb / duration * 3600, 2),
+            'estimatedCredits': _round(credits, 4),
+            'estimatedCostUsd': _round(cost, 2),
+            'costPerMillionRows': _round(cost / rows * 1e6, 2) if rows else 0,
+            'costPerGb': _round(cost / data_gb, 2) if data_gb else 0,
+            'warehouseEquivalentCost': _round(warehouse_cost, 2),
+            'savingsPercent': _round((1 - cost / max(warehouse_cost, 0.01)) * 100),
+            'firstEvent': _iso(first),
+            'lastEvent': _iso(last),
+        }
+
+    def observe_end_offsets(self, end_offsets):
+        """Record {architecture: {partition: log-end offset}}; returns partitions updated"""
+        updated = 0
+        with self.lock:
+            for key, offsets in end_offsets.items():
+                if key not in self.architectures or ARCHITECTURES[key]['cursor'] != 'kafka':
+                    raise ValueError(f"{key} has no Kafka partitions")
+                self.architectures[key].observe_end_offsets(offsets)
+                updated += len(offsets)
+        return updated
+
+    def lag(self):
+        """Offset lag for Kafka-fed architectures, measured only with fresh end offsets"""
+        with self.lock:
+            views = {}
+            for key, m in self.architectures.items():
+                if ARCHITECTURES[key]['cursor'] != 'kafka':
+                    continue
+                lag = m.lag(END_OFFSETS_MAX_AGE_S)
+                measured = [v for v in lag.values() if v is not None]
+                views[key] = {'offsets': m.offsets, 'lag': lag,
+                              'totalLag': sum(measured) if measured else None,
+                              'measured': bool(lag) and len(measured) == len(lag),
+                              'endOffsetsAt': _iso(m.end_offsets_at)}
+            return views
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class SnowflakeTail:
+    """Reads only rows past the recorded cursor for one table
+
+    Kafka-fed tables are cut exactly on RECORD_METADATA partition/offset.
+    SDK-fed tables have no RECORD_METADATA, so they are tailed on an
+    ingest-time column: each poll re-reads OVERLAP_S behind the cursor to
+    catch rows that commit late and drops EVENT_IDs already counted.
+    """
+
+    OVERLAP_S = 5
+
+    def __init__(self, conn, database, architecture, metrics, ingest_column='INGESTED_AT'):
+        self.conn = conn
+        self.table = f"{database}.{ARCHITECTURES[architecture]['table']}"
+        self.architecture = architecture
+        self.metrics = metrics
+        self.cursor_column = None
+        if ARCHITECTURES[architecture]['cursor'] == 'ingest_time':
+            self.cursor_column = self._resolve_ingest_column(database, ingest_column)
+
+    def _resolve_ingest_column(self, database, column):
+        schema, table = ARCHITECTURES[self.architecture]['table'].split('.')
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"SELECT COUNT(*) FROM {database}.INFORMATION_SCHEMA.COLUMNS "
+                        f"WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+                        (schema, table, column.upper()))
+            found = cur.fetchone()[0]
+        finally:
+            cur.close()
+        if found:
+            return column.upper()
+        print(f"{self.table} has no {column.upper()} column; tailing on EVENT_TIMESTAMP, so rows "
+              f"landing more than {self.OVERLAP_S}s behind the newest event time are missed")
+        return 'EVENT_TIMESTAMP'
+
+    def _fetch(self, sql, params=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, params)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def poll(self, limit=50000):
+        """Ingest new rows; limit is per Kafka partition, or per poll for ingest-time tails"""
+        if self.cursor_column:
+            return self._poll_ingest_time(limit)
+        return self._poll_kafka(limit)
+
+    def _poll_kafka(self, limit):
+        arch = self.metrics.architectures[self.architecture]
+        offsets = dict(arch.offsets)
+        partition = "RECORD_METADATA:partition::INTEGER"
+        offset = "RECORD_METADATA:offset::INTEGER"
+        where = []
+        if offsets:
+            known = ' OR '.join(f"({partition} = {int(p)} AND {offset} > {int(o)})" for p, o in offsets.items())
+            unknown = f"{partition} NOT IN ({', '.join(str(int(p)) for p in offsets)})"
+            where.append(f"({known} OR {unknown})")
+        # No event-time filter: a lagging partition or a connector backlog
+        # carries old EVENT_TIMESTAMPs, and hiding those rows would let the
+        # offset cursor move past them uncounted. Rows are capped per partition,
+        # contiguous from the cursor, so low-numbered partitions cannot starve
+        # the rest. Latency is measured against the Kafka CreateTime, as in
+        # streaming-stats/route.ts.
+        sql = (f"SELECT EVENT_TIMESTAMP, TO_TIMESTAMP_NTZ(RECORD_METADATA:CreateTime::NUMBER / 1000), "
+               f"{partition}, {offset} FROM {self.table}"
+               + (f" WHERE {' AND '.join(where)}" if where else '')
+               + f" QUALIFY ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {offset}) <= {int(limit)}"
+               + f" ORDER BY {partition}, {offset}")
+        events = [{'event_timestamp': e, 'ingested_at': i, 'kafka_partition': p, 'kafka_offset': o}
+                  for e, i, p, o in self._fetch(sql)]
+        return self.metrics.ingest(self.architecture, events)
+
+    def _poll_ingest_time(self, limit):
+        arch = self.metrics.architectures[self.architecture]
+        column = self.cursor_column
+        with self.metrics.lock:
+            cursor = arch.cursor
+            # Rows already counted inside the overlap come back too; widen the
+            # limit by that many so a full overlap can never stall the tail
+            overlap_rows = sum(1 for t in arch.seen_ids.values()
+                               if cursor is not None and t >= cursor - self.OVERLAP_S)
+        ingested = column if column != 'EVENT_TIMESTAMP' else 'NULL'
+        sql = f"SELECT EVENT_ID, EVENT_TIMESTAMP, {ingested}, {column} FROM {self.table}"
+        params = None
+        if cursor is not None:
+            sql += f" WHERE {column} >= TO_TIMESTAMP_NTZ(%s)"
+            params = (cursor - self.OVERLAP_S,)
+        sql += f" ORDER BY {column}, EVENT_ID LIMIT {int(limit) + overlap_rows}"
+        events = [{'event_id': i, 'event_timestamp': e, 'ingested_at': a, 'cursor_at': c}
+                  for i, e, a, c in self._fetch(sql, params)]
+        count = self.metrics.ingest(self.architecture, events)
+        self.metrics.prune_seen(self.architecture, self.OVERLAP_S)
+        return count
+
+
+class DemoFeed:
+    """Synthetic classic and high-performance feeds with different latency profiles"""
+
+    def __init__(self, metrics, rates=None, partitions=4, seed=3):
+        self.metrics = metrics
+        self.rates = rates or {'classic': 400, 'high_perf': 2500}
+        self.random = random.Random(seed)
+        self.partitions = partitions
+        self.next_offset = {k: defaultdict(int) for k in ARCHITECTURES}
+        self.next_id = 0
+        self.last = time.time()
+
+    def poll(self):
+        now = time.time()
+        elapsed, self.last = now - self.last, now
+        for key, rate in self.rates.items():
+            events = []
+            for _ in range(int(rate * elapsed)):
+                event = {'ingested_at': now, 'bytes': self.random.randint(200, 320)}
+                if ARCHITECTURES[key]['cursor'] == 'kafka':
+                    # Classic connector buffers for seconds
+                    partition = self.random.randrange(self.partitions)
+                    event['kafka_partition'] = partition
+                    event['kafka_offset'] = self.next_offset[key][partition]
+                    self.next_offset[key][partition] += 1
+                    event['event_timestamp'] = now - self.random.lognormvariate(1.2, 0.5)
+                else:
+                    # High-perf SDK lands sub-second and has no Kafka metadata
+                    self.next_id += 1
+                    event['event_id'] = f"HP{self.next_id:012d}"
+                    event['event_timestamp'] = now - self.random.lognormvariate(-1.2, 0.6)
+                events.append(event)
+            self.metrics.ingest(key, events)
+            self.metrics.prune_seen(key, SnowflakeTail.OVERLAP_S)
+            if self.next_offset[key]:
+                # Broker end offsets run slightly ahead of what has landed
+                self.metrics.architectures[key].observe_end_offsets(
+                    {p: o + self.random.randint(0, 50) for p, o in self.next_offset[key].items()})
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def make_handler(metrics):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            path, _, query = self.path.partition('?')
+            architecture = 'high_perf' if 'high_perf' in query else 'classic'
+            routes = {
+                '/streaming-compare': metrics.compare,
+                '/streaming-stats': lambda: metrics.stats(architecture),
+                '/streaming-cost': lambda: metrics.cost(architecture),
+                '/lag': metrics.lag,
+            }
+            if path not in routes:
+                self.send_error(404)
+                return
+            self._send_json(routes[path]())
+
+        def do_POST(self):
+            if self.path.partition('?')[0] != '/end-offsets':
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                updated = metrics.observe_end_offsets(json.loads(self.rfile.read(length)))
+            except (ValueError, AttributeError) as exc:
+                self.send_error(400, str(exc))
+                return
+            self._send_json({'updated': updated})
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(args):
+    metrics = StreamingMetrics(args.state_dir)
+    if args.demo:
+        sources = [DemoFeed(metrics)]
+    else:
+        conn = _connect()
+        sources = [SnowflakeTail(conn, args.database, key, metrics, args.ingest_column)
+                   for key in ARCHITECTURES]
+
+    def loop():
+        last_checkpoint = time.time()
+        while True:
+            for source in sources:
+                try:
+                    source.poll()
+                except Exception as exc:
+                    print(f"Poll failed: {exc}")
+            if time.time() - last_checkpoint >= args.checkpoint_interval:
+                metrics.checkpoint()
+                last_checkpoint = time.time()
+            time.sleep(args.poll_interval)
+
+    threading.Thread(target=loop, daemon=True).start()
+    # Container stops send SIGTERM; exit through the finally so the last
+    # minutes are checkpointed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(metrics))
+    print(f"Serving streaming metrics on http://{args.host}:{args.port}/streaming-compare "
+          f"({'demo' if args.demo else args.database})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        metrics.checkpoint(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['serve', 'ingest', 'report'])
+    parser.add_argument('--state-dir', default='streaming_metrics', help='Rollup and checkpoint directory')
+    parser.add_argument('--database', default=os.getenv('SNOWFLAKE_DATABASE', 'PHANTOM_IROPS'))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--checkpoint-interval', type=float, default=30.0)
+    parser.add_argument('--demo', action='store_true', help='Synthetic feeds instead of Snowflake')
+    parser.add_argument('--ingest-column', default='INGESTED_AT',
+                        help='Ingest-time column used to tail FLIGHT_EVENTS_HIGH_PERF')
+    parser.add_argument('--input', help='JSON lines of events for ingest')
+    parser.add_argument('--architecture', choices=sorted(ARCHITECTURES), default='classic')
+    parser.add_argument('--end-offsets', help='JSON {architecture: {partition: log-end offset}} for ingest')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args)
+        return
+    metrics = StreamingMetrics(args.state_dir)
+    if args.command == 'ingest':
+        if not args.input and not args.end_offsets:
+            raise SystemExit("--input or --end-offsets is required for ingest")
+        if args.end_offsets:
+            with open(args.end_offsets) as f:
+                updated = metrics.observe_end_offsets(json.load(f))
+            print(f"Recorded end offsets for {updated} partition(s)")
+        if args.input:
+            with open(args.input) as f:
+                events = [{k.lower(): v for k, v in json.loads(line).items()} for line in f if line.strip()]
+            accepted = metrics.ingest(args.architecture, events)
+            print(f"Ingested {accepted:,} new {args.architecture} events "
+                  f"({len(events) - accepted:,} already counted)")
+        metrics.checkpoint()
+    print(json.dumps({'compare': metrics.compare(), 'lag': metrics.lag()}, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()